@@ -0,0 +1,62 @@
+#!/usr/bin/env python3
+"""
+守护进程（start_*_daemon.py）共用工具
+"""
+
+import os
+import select
+import signal
+import time
+
+# SIGCHLD 唤醒管道的可读端；None 表示尚未安装，False 表示当前平台不支持
+_wakeup_fd = None
+
+
+def _child_watcher():
+    """
+    安装子进程退出监听（只安装一次）
+
+    SIGCHLD 到达时由解释器向自管道写入一个字节，等待方对它 select，
+    子进程一退出即被唤醒。Linux 和 macOS 均适用；
+    没有 SIGCHLD 的平台（Windows）或非主线程中调用时返回 None，退回定时等待。
+    """
+    global _wakeup_fd
+    if _wakeup_fd is None:
+        _wakeup_fd = False
+        if hasattr(signal, "SIGCHLD"):
+            r, w = os.pipe()
+            os.set_blocking(r, False)
+            os.set_blocking(w, False)
+            try:
+                signal.set_wakeup_fd(w)
+                # 必须安装 Python 处理函数，否则 SIGCHLD 默认被忽略，不会写入唤醒管道
+                signal.signal(signal.SIGCHLD, lambda signum, frame: None)
+                _wakeup_fd = r
+            except ValueError:
+                # 信号只能在主线程中设置
+                os.close(r)
+                os.close(w)
+    return _wakeup_fd or None
+
+
+def wait_for_exit(process, timeout):
+    """
+    等待子进程退出，最多等待 timeout 秒
+
+    进程一退出立即返回；其他子进程或信号造成的唤醒会继续等待剩余时间。
+    """
+    deadline = time.monotonic() + timeout
+    wakeup_fd = _child_watcher()
+    while process.poll() is None:
+        remaining = deadline - time.monotonic()
+        if remaining <= 0:
+            return
+        if wakeup_fd is None:
+            time.sleep(min(remaining, 0.5))
+            continue
+        ready, _, _ = select.select([wakeup_fd], [], [], remaining)
+        if ready:
+            try:
+                os.read(wakeup_fd, 4096)
+            except BlockingIOError:
+                pass
@@ -1,16 +1,18 @@
 #!/usr/bin/env python3
 """
 飞书 OpenAPI MCP 客户端
-通过 JSON-RPC 直接调用本地 OpenAPI MCP 服务
+通过标准输入输出以 JSON-RPC 调用本地 OpenAPI MCP 服务
 """
 
 import os
 import json
+import itertools
 import logging
+import queue
+import signal
 import subprocess
 import threading
 import time
-import requests
 from typing import Optional, List, Dict, Any
 from dataclasses import dataclass
 from dotenv import load_dotenv
@@ -22,7 +24,9 @@ logger = logging.getLogger(__name__)
 # 默认配置
 DEFAULT_SEARCH_COUNT = 3
 MAX_CONTENT_LENGTH = 4000
-MCP_SERVER_PORT = 3000  # OpenAPI MCP 默认端口
+
+# 单篇文档的 LLM 上下文模板，模块加载时绑定一次
+_DOC_TMPL = "\n---\n### 📄 文档 {i}: {title}\n- 链接: {url}\n{hint}\n\n**内容:**\n{content}\n".format
 
 @dataclass
 class SearchResult:
@@ -53,11 +57,14 @@ class FeishuOpenAPIClient:
         self.app_id = app_id
         self.app_secret = app_secret
         self.process: Optional[subprocess.Popen] = None
-        self.request_id = 0
+        self._id_iter = itertools.count(1)  # next() 在 C 层原子执行，并发调用不会产生重复 ID
         self._lock = threading.Lock()
+        self._write_lock = threading.Lock()
+        self._pending_lock = threading.Lock()
+        self._pending: Dict[int, queue.Queue] = {}  # 请求 ID -> 等待响应的队列
         
     def start_mcp_service(self) -> bool:
-        """启动 OpenAPI MCP 服务"""
+        """启动 OpenAPI MCP 服务（stdio 传输）"""
         with self._lock:
             if self.process and self.process.poll() is None:
                 logger.info("✅ OpenAPI MCP 服务已在运行")
@@ -66,25 +73,31 @@ class FeishuOpenAPIClient:
             try:
                 logger.info("🚀 启动 OpenAPI MCP 服务...")
                 
-                # 构建命令
+                # 构建命令，使用默认的 stdio 传输，不再监听端口
                 cmd = [
                     "npx", "-y", "@larksuiteoapi/lark-mcp", "mcp",
                     "-a", self.app_id,
                     "-s", self.app_secret,
-                    "--oauth",
-                    "--port", str(MCP_SERVER_PORT)
+                    "--oauth"
                 ]
                 
-                # 启动进程
+                # 启动进程，通过管道收发 JSON-RPC
                 self.process = subprocess.Popen(
                     cmd,
-                    stdout=subprocess.DEVNULL,
+                    stdin=subprocess.PIPE,
+                    stdout=subprocess.PIPE,
                     stderr=subprocess.DEVNULL,
-                    text=True
+                    text=True,
+                    encoding="utf-8",  # 请求以 ensure_ascii=False 写入，不能依赖区域设置（容器中常为 C/POSIX）
+                    bufsize=1
                 )
                 
-                # 等待服务启动
-                time.sleep(3)
+                # 后台线程读取响应并按 ID 分发给调用方
+                threading.Thread(
+                    target=self._reader_loop,
+                    args=(self.process,),
+                    daemon=True
+                ).start()
                 
                 if self.process.poll() is None:
                     logger.info("✅ OpenAPI MCP 服务启动成功")
@@ -110,10 +123,36 @@ class FeishuOpenAPIClient:
                 finally:
                     self.process = None
     
+    def _reader_loop(self, process: subprocess.Popen):
+        """读取 MCP 进程输出，将响应投递到对应请求 ID 的队列"""
+        try:
+            for line in process.stdout:
+                line = line.strip()
+                if not line:
+                    continue
+                try:
+                    message = json.loads(line)
+                except json.JSONDecodeError:
+                    logger.debug(f"忽略非 JSON 输出: {line[:100]}")
+                    continue
+                
+                with self._pending_lock:
+                    waiter = self._pending.pop(message.get("id"), None)
+                if waiter is not None:
+                    waiter.put(message)
+        except Exception as e:
+            logger.error(f"❌ 读取 MCP 输出失败: {e}")
+        finally:
+            # 进程退出，唤醒所有仍在等待的调用方
+            with self._pending_lock:
+                waiters = list(self._pending.values())
+                self._pending.clear()
+            for waiter in waiters:
+                waiter.put(None)
+    
     def _get_next_id(self) -> int:
         """获取下一个请求 ID"""
-        self.request_id += 1
-        return self.request_id
+        return next(self._id_iter)
     
     def _call_mcp_method(self, method: str, params: Dict = None) -> Optional[Dict]:
         """
@@ -129,38 +168,45 @@ class FeishuOpenAPIClient:
         if not self.start_mcp_service():
             return None
         
+        request_id = self._get_next_id()
+        waiter: queue.Queue = queue.Queue(maxsize=1)
+        
         try:
             payload = {
                 "jsonrpc": "2.0",
-                "id": self._get_next_id(),
-                "method": method
+                "id": request_id,
+                "method": method,
+                "params": params or {}
             }
             
-            if params:
-                payload["params"] = params
-            
             logger.info(f"📡 调用 MCP 方法: {method}")
             
-            response = requests.post(
-                f"http://localhost:{MCP_SERVER_PORT}",
-                json=payload,
-                headers={"Content-Type": "application/json"},
-                timeout=30
-            )
+            with self._pending_lock:
+                self._pending[request_id] = waiter
+            
+            line = json.dumps(payload, ensure_ascii=False) + "\n"
+            with self._write_lock:
+                self.process.stdin.write(line)
+                self.process.stdin.flush()
             
-            if response.status_code == 200:
-                result = response.json()
-                if "error" in result:
-                    logger.error(f"❌ MCP 错误: {result['error']}")
-                    return None
-                return result.get("result")
-            else:
-                logger.error(f"❌ MCP 请求失败: {response.status_code}")
+            result = waiter.get(timeout=30)
+            if result is None:
+                logger.error("❌ MCP 进程已退出")
                 return None
+            if "error" in result:
+                logger.error(f"❌ MCP 错误: {result['error']}")
+                return None
+            return result.get("result")
                 
+        except queue.Empty:
+            logger.error(f"❌ MCP 调用超时: {method}")
+            return None
         except Exception as e:
             logger.error(f"❌ MCP 调用失败: {e}")
             return None
+        finally:
+            with self._pending_lock:
+                self._pending.pop(request_id, None)
     
     def initialize(self) -> bool:
         """初始化 MCP 连接"""
@@ -340,17 +386,9 @@ class FeishuOpenAPIDocsManager:
         
         for i, doc in enumerate(documents, 1):
             truncate_hint = " (内容已截断)" if doc.truncated else ""
-            
-            part = f"""
----
-### 📄 文档 {i}: {doc.title}
-- 链接: {doc.url}
-{truncate_hint}
-
-**内容:**
-{doc.content}
-"""
-            formatted_parts.append(part)
+            formatted_parts.append(_DOC_TMPL(
+                i=i, title=doc.title, url=doc.url, hint=truncate_hint, content=doc.content
+            ))
         
         formatted_parts.append("\n---\n以上是检索到的文档内容，请基于这些信息回答用户问题。")
         return "\n".join(formatted_parts)
@@ -389,4 +427,32 @@ def search_feishu_knowledge_openapi(query: str, count: int = 3) -> str:
 
 # 程序退出时清理资源
 import atexit
-atexit.register(lambda: [manager.client.stop_mcp_service() for manager in _managers.values()])
\ No newline at end of file
+
+def _cleanup_mcp_services(timeout: float = 5.0):
+    """并行停止所有 MCP 子进程，总等待时间不超过 timeout 秒"""
+    processes = []
+    for manager in _managers.values():
+        process = manager.client.process
+        if process and process.poll() is None:
+            try:
+                process.send_signal(signal.SIGTERM)
+                processes.append(process)
+            except Exception:
+                pass
+    
+    deadline = time.monotonic() + timeout
+    while processes and time.monotonic() < deadline:
+        processes = [p for p in processes if p.poll() is None]
+        if processes:
+            time.sleep(0.05)
+    
+    for process in processes:
+        try:
+            process.kill()
+        except Exception:
+            pass
+    
+    for manager in _managers.values():
+        manager.client.process = None
+
+atexit.register(_cleanup_mcp_services)
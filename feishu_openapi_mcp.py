@@ -169,6 +169,10 @@ class FeishuOpenAPIDocsManager:
         self.max_content_length = max_content_length
         self.mcp_client = FeishuOpenAPIMCPClient(app_id, app_secret)
     
+    def warmup(self) -> bool:
+        """预先启动 MCP 服务，避免首次搜索承担服务启动耗时"""
+        return self.mcp_client.start_mcp_service()
+    
     def search_documents(self, query: str, count: int = DEFAULT_SEARCH_COUNT) -> List[SearchResult]:
         """搜索文档"""
         return self.mcp_client.search_documents(query, count)
@@ -0,0 +1,29 @@
+#!/usr/bin/env python3
+"""
+Qoder 服务的 gunicorn 配置
+用法: gunicorn -c gunicorn_conf.py qoder_qwen:app
+"""
+
+import multiprocessing
+import os
+
+# 监听地址
+bind = f"0.0.0.0:{os.getenv('QODER_PORT', '8081')}"
+
+# 上游 LLM 调用是 I/O 密集型：多进程 + 每进程多线程，等待上游时其他请求可继续处理
+# 云平台上 cpu_count() 可能返回宿主机核数，默认最多 4 个进程以控制内存
+workers = int(os.getenv("QODER_WORKERS", min(multiprocessing.cpu_count() * 2 + 1, 4)))
+worker_class = "gthread"
+threads = int(os.getenv("QODER_THREADS", 16))
+
+# 在 master 进程中预先导入应用，worker fork 后以写时复制共享已加载的模块与编译好的正则，
+# 减少每个 worker 的常驻内存和冷启动时间（导入阶段不建立任何网络连接，fork 安全）
+preload_app = True
+
+# 千问响应最长 60 秒，加上连接重试的退避时间
+timeout = 120
+keepalive = 75
+
+# 日志输出到标准输出，便于容器收集
+accesslog = "-"
+errorlog = "-"
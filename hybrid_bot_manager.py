@@ -10,7 +10,7 @@ import json
 import logging
 import threading
 import time
-from typing import Optional, Dict, Any
+from typing import Optional, Dict, Any, Tuple
 from dataclasses import dataclass
 
 from dotenv import load_dotenv
@@ -18,6 +18,31 @@ load_dotenv()
 
 logger = logging.getLogger(__name__)
 
+QODER_CONFIG_PATH = os.path.expanduser("~/.qoder/settings.json")
+
+# REST API 搜索函数，首次健康检查时导入
+_search_feishu = None
+
+# Qoder 配置解析缓存: {path: (mtime_ns, size, parsed)}
+_qoder_cfg_cache: Dict[str, tuple] = {}
+
+def _load_qoder_config(path: str = QODER_CONFIG_PATH) -> Optional[Dict[str, Any]]:
+    """读取 Qoder 配置，文件未变化时直接返回缓存的解析结果；文件不存在时返回 None"""
+    try:
+        st = os.stat(path)
+    except FileNotFoundError:
+        _qoder_cfg_cache.pop(path, None)
+        return None
+    
+    cached = _qoder_cfg_cache.get(path)
+    if cached and cached[0] == st.st_mtime_ns and cached[1] == st.st_size:
+        return cached[2]
+    
+    with open(path, 'rb') as f:
+        parsed = json.loads(f.read())
+    _qoder_cfg_cache[path] = (st.st_mtime_ns, st.st_size, parsed)
+    return parsed
+
 @dataclass
 class RuntimeMode:
     """运行模式配置"""
@@ -30,11 +55,31 @@ class RuntimeMode:
 class HybridBotManager:
     """混合模式机器人管理器"""
     
+    # 降级顺序：从功能最全到最稳定
+    _FALLBACK_ORDER = ("qoder_mcp", "official_mcp", "rest_api")
+    
     def __init__(self):
         self.modes = self._init_modes()
         self.current_mode = self._determine_initial_mode()
         self.health_thread: Optional[threading.Thread] = None
         self.running = False
+        self._wake_event = threading.Event()  # 用于停止监控或切换模式时立即唤醒健康检查线程
+        self._lock = threading.Lock()
+        self._rest_api_last_success = 0.0  # 上次 REST API 健康检查成功的时间
+        # 模式名 -> 健康检查函数
+        self._health_fn = {
+            "qoder_mcp": self._check_qoder_mcp_health,
+            "official_mcp": self._check_official_mcp_health,
+            "rest_api": self._check_rest_api_health,
+        }
+        # 模式名 -> 在降级顺序中的位置，以及之后依次尝试的备用模式
+        self._fallback_index = {name: i for i, name in enumerate(self._FALLBACK_ORDER)}
+        self._fallback_chain = {
+            name: self._FALLBACK_ORDER[i + 1:] for name, i in self._fallback_index.items()
+        }
+        # 批量健康检查快照: 模式名 -> (检查时间, 是否健康)，在最短检查间隔内有效
+        self._health_snapshot: Dict[str, Tuple[float, bool]] = {}
+        self._snapshot_ttl = min(mode.health_check_interval for mode in self.modes.values())
         
     def _init_modes(self) -> Dict[str, RuntimeMode]:
         """初始化运行模式"""
@@ -71,16 +116,13 @@ class HybridBotManager:
             return self.modes[forced_mode]
         
         # 检查 Qoder MCP 配置文件是否存在
-        qoder_config_path = os.path.expanduser("~/.qoder/settings.json")
-        if os.path.exists(qoder_config_path):
-            try:
-                with open(qoder_config_path, 'r') as f:
-                    qoder_config = json.load(f)
-                if "mcpServers" in qoder_config and "feishu" in qoder_config["mcpServers"]:
-                    logger.info("✅ 检测到 Qoder 中配置的飞书 MCP 服务")
-                    return self.modes["qoder_mcp"]
-            except Exception as e:
-                logger.warning(f"⚠️ 读取 Qoder 配置失败: {e}")
+        try:
+            qoder_config = _load_qoder_config()
+            if qoder_config and "mcpServers" in qoder_config and "feishu" in qoder_config["mcpServers"]:
+                logger.info("✅ 检测到 Qoder 中配置的飞书 MCP 服务")
+                return self.modes["qoder_mcp"]
+        except Exception as e:
+            logger.warning(f"⚠️ 读取 Qoder 配置失败: {e}")
         
         # 检查官方 MCP 配置
         official_mcp_url = os.getenv("FEISHU_OFFICIAL_MCP_URL")
@@ -94,17 +136,20 @@ class HybridBotManager:
     
     def start_health_monitoring(self):
         """启动健康监控"""
-        if self.health_thread and self.health_thread.is_alive():
-            return
-            
-        self.running = True
-        self.health_thread = threading.Thread(target=self._health_check_loop, daemon=True)
-        self.health_thread.start()
+        with self._lock:
+            if self.health_thread and self.health_thread.is_alive():
+                return
+                
+            self.running = True
+            self._wake_event.clear()
+            self.health_thread = threading.Thread(target=self._health_check_loop, daemon=True)
+            self.health_thread.start()
         logger.info(f"✅ 启动健康监控 (模式: {self.current_mode.name})")
     
     def stop_health_monitoring(self):
         """停止健康监控"""
         self.running = False
+        self._wake_event.set()
         if self.health_thread:
             self.health_thread.join(timeout=5)
         logger.info("⏹️ 停止健康监控")
@@ -113,6 +158,9 @@ class HybridBotManager:
         """健康检查循环"""
         while self.running:
             try:
+                # 一次性探测当前模式及其备用模式，降级时可直接使用结果
+                self._refresh_health_snapshot()
+                
                 if not self._check_current_mode_health():
                     if self.current_mode.auto_fallback:
                         self._attempt_fallback()
@@ -122,18 +170,37 @@ class HybridBotManager:
             except Exception as e:
                 logger.error(f"❌ 健康检查异常: {e}")
             
-            time.sleep(self.current_mode.health_check_interval)
+            # 等待下一次检查；停止或切换模式时会被提前唤醒
+            self._wake_event.wait(self.current_mode.health_check_interval)
+            self._wake_event.clear()
+    
+    def _refresh_health_snapshot(self):
+        """批量检查当前模式及其备用模式的健康状态"""
+        names = (self.current_mode.name,) + self._fallback_chain.get(self.current_mode.name, ())
+        for name in names:
+            try:
+                healthy = self._health_fn[name]()
+            except Exception as e:
+                logger.error(f"❌ 健康检查失败: {e}")
+                healthy = False
+            self._health_snapshot[name] = (time.time(), healthy)
+    
+    def _snapshot_health(self, name: str) -> Optional[bool]:
+        """读取未过期的健康快照，没有则返回 None"""
+        entry = self._health_snapshot.get(name)
+        if entry and time.time() - entry[0] < self._snapshot_ttl:
+            return entry[1]
+        return None
     
     def _check_current_mode_health(self) -> bool:
         """检查当前模式健康状态"""
+        cached = self._snapshot_health(self.current_mode.name)
+        if cached is not None:
+            return cached
+        
         try:
-            if self.current_mode.name == "qoder_mcp":
-                return self._check_qoder_mcp_health()
-            elif self.current_mode.name == "official_mcp":
-                return self._check_official_mcp_health()
-            elif self.current_mode.name == "rest_api":
-                return self._check_rest_api_health()
-            return False
+            health_fn = self._health_fn.get(self.current_mode.name)
+            return health_fn() if health_fn else False
         except Exception as e:
             logger.error(f"❌ 健康检查失败: {e}")
             return False
@@ -141,15 +208,13 @@ class HybridBotManager:
     def _check_qoder_mcp_health(self) -> bool:
         """检查 Qoder MCP 健康状态"""
         # 检查 Qoder 配置文件
-        qoder_config_path = os.path.expanduser("~/.qoder/settings.json")
-        if not os.path.exists(qoder_config_path):
-            logger.warning("⚠️ Qoder 配置文件不存在")
-            return False
-            
-        # 检查飞书 MCP 配置
         try:
-            with open(qoder_config_path, 'r') as f:
-                config = json.load(f)
+            config = _load_qoder_config()
+            if config is None:
+                logger.warning("⚠️ Qoder 配置文件不存在")
+                return False
+            
+            # 检查飞书 MCP 配置
             if "mcpServers" not in config or "feishu" not in config["mcpServers"]:
                 logger.warning("⚠️ Qoder 中未配置飞书 MCP 服务")
                 return False
@@ -167,10 +232,19 @@ class HybridBotManager:
     
     def _check_rest_api_health(self) -> bool:
         """检查 REST API 健康状态"""
+        global _search_feishu
+        
+        # 最近两个检查周期内成功过，无需再次实际调用接口
+        interval = self.modes["rest_api"].health_check_interval
+        if time.time() - self._rest_api_last_success < 2 * interval:
+            return True
+        
         try:
-            from rest_api_client import search_feishu_knowledge_real
+            if _search_feishu is None:
+                from rest_api_client import search_feishu_knowledge_real as _search_feishu
             # 简单测试搜索功能
-            result = search_feishu_knowledge_real("测试", 1)
+            result = _search_feishu("测试", 1)
+            self._rest_api_last_success = time.time()
             logger.info("✅ REST API 健康检查通过")
             return True
         except Exception as e:
@@ -179,14 +253,16 @@ class HybridBotManager:
     
     def _attempt_fallback(self):
         """尝试降级到备用模式"""
-        fallback_order = ["rest_api", "official_mcp", "qoder_mcp"]
-        
-        current_index = fallback_order.index(self.current_mode.name)
-        for i in range(current_index + 1, len(fallback_order)):
-            fallback_mode = self.modes[fallback_order[i]]
-            if self._test_mode_availability(fallback_mode):
-                logger.info(f"🔄 降级到备用模式: {fallback_mode.name}")
-                self.current_mode = fallback_mode
+        for mode_name in self._fallback_chain[self.current_mode.name]:
+            available = self._snapshot_health(mode_name)
+            if available is None:
+                try:
+                    available = self._health_fn[mode_name]()
+                except Exception:
+                    available = False
+            if available:
+                logger.info(f"🔄 降级到备用模式: {mode_name}")
+                self.current_mode = self.modes[mode_name]
                 return
         
         logger.error("❌ 无可用的备用模式")
@@ -194,13 +270,8 @@ class HybridBotManager:
     def _test_mode_availability(self, mode: RuntimeMode) -> bool:
         """测试模式可用性"""
         try:
-            if mode.name == "rest_api":
-                return self._check_rest_api_health()
-            elif mode.name == "official_mcp":
-                return self._check_official_mcp_health()
-            elif mode.name == "qoder_mcp":
-                return self._check_qoder_mcp_health()
-            return False
+            health_fn = self._health_fn.get(mode.name)
+            return health_fn() if health_fn else False
         except Exception:
             return False
     
@@ -226,6 +297,8 @@ class HybridBotManager:
             old_mode = self.current_mode.name
             self.current_mode = new_mode
             logger.info(f"🔄 模式切换: {old_mode} → {new_mode.name}")
+            # 唤醒健康检查线程，按新模式的间隔重新检查
+            self._wake_event.set()
             return True
         else:
             logger.error(f"❌ 模式 {mode_name} 不可用")
@@ -233,12 +306,15 @@ class HybridBotManager:
 
 # 全局实例
 _bot_manager: Optional[HybridBotManager] = None
+_bot_manager_lock = threading.Lock()
 
 def get_bot_manager() -> HybridBotManager:
     """获取机器人管理器实例"""
     global _bot_manager
     if _bot_manager is None:
-        _bot_manager = HybridBotManager()
+        with _bot_manager_lock:
+            if _bot_manager is None:
+                _bot_manager = HybridBotManager()
     return _bot_manager
 
 def start_hybrid_bot():
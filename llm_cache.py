@@ -0,0 +1,96 @@
+#!/usr/bin/env python3
+"""
+LLM 回复缓存 - 对完全相同的对话上下文直接复用上次的回复
+"""
+
+import hashlib
+import json
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Callable, Dict, Optional, Tuple
+
+# 预先绑定的编码器：json.dumps 传入非默认参数时每次都会新建 JSONEncoder
+_encode_key = json.JSONEncoder(sort_keys=True, ensure_ascii=False).encode
+
+
+class _Flight:
+    """一次进行中的上游调用"""
+    __slots__ = ("event", "result", "error")
+
+    def __init__(self):
+        self.event = threading.Event()
+        self.result: Optional[str] = None
+        self.error: Optional[BaseException] = None
+
+
+class LLMCache:
+    """带 TTL 的线程安全 LRU 缓存"""
+
+    def __init__(self, maxsize: int = 2048, ttl: float = 3600):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self._data: "OrderedDict[bytes, Tuple[float, str]]" = OrderedDict()
+        self._lock = threading.Lock()
+        self._inflight: Dict[bytes, _Flight] = {}
+
+    @staticmethod
+    def make_key(model: str, messages: Any) -> bytes:
+        """根据模型和完整消息列表生成缓存键（32 字节原始摘要，比十六进制字符串省一半内存）"""
+        raw = _encode_key({"model": model, "messages": messages})
+        return hashlib.sha256(raw.encode("utf-8")).digest()
+
+    def get(self, key: bytes) -> Optional[str]:
+        """命中且未过期时返回缓存的回复"""
+        with self._lock:
+            entry = self._data.get(key)
+            if entry is None:
+                return None
+            expires_at, value = entry
+            if expires_at < time.monotonic():
+                del self._data[key]
+                return None
+            self._data.move_to_end(key)
+            return value
+
+    def set(self, key: bytes, value: str):
+        """写入回复，超出容量时淘汰最久未使用的条目"""
+        with self._lock:
+            self._data[key] = (time.monotonic() + self.ttl, value)
+            self._data.move_to_end(key)
+            while len(self._data) > self.maxsize:
+                self._data.popitem(last=False)
+
+    def clear(self):
+        """清空所有缓存条目"""
+        with self._lock:
+            self._data.clear()
+
+    def single_flight(self, key: bytes, fn: Callable[[], str]) -> str:
+        """同一键的并发调用只执行一次 fn，其余调用方等待并复用其结果
+
+        fn 抛出异常时，等待方重新抛出同一异常，而不是各自再调用一次 fn，
+        避免上游出错时所有等待的请求同时重试。
+        """
+        with self._lock:
+            flight = self._inflight.get(key)
+            leader = flight is None
+            if leader:
+                flight = self._inflight[key] = _Flight()
+
+        if not leader:
+            flight.event.wait()
+            if flight.error is not None:
+                raise flight.error
+            return flight.result
+
+        try:
+            flight.result = fn()
+            return flight.result
+        except BaseException as e:
+            flight.error = e
+            raise
+        finally:
+            with self._lock:
+                self._inflight.pop(key, None)
+            flight.event.set()
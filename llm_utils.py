@@ -0,0 +1,28 @@
+#!/usr/bin/env python3
+"""
+Qoder LLM 服务（千问、Gemini）共用的序列化与 SSE 工具
+"""
+
+import json
+
+# 预先绑定的编码器：json.dumps 传入非默认参数时每次都会新建 JSONEncoder
+_ENCODER = json.JSONEncoder(ensure_ascii=False)
+encode_json = _ENCODER.encode
+
+
+def truncate_json(obj, limit):
+    """增量序列化 obj，产出 limit 个字符后即停止，避免为截断日志序列化整个响应"""
+    out, size = [], 0
+    for chunk in _ENCODER.iterencode(obj):
+        out.append(chunk)
+        size += len(chunk)
+        if size >= limit:
+            break
+    return "".join(out)[:limit]
+
+
+def sse_events(chunks):
+    """将回复片段包装为 SSE 事件流"""
+    for chunk in chunks:
+        yield f"data: {encode_json({'delta': chunk})}\n\n"
+    yield "data: [DONE]\n\n"
@@ -5,7 +5,24 @@
 """
 
 import re
-from typing import Dict, List, Optional
+import textwrap
+from functools import lru_cache
+from typing import Dict, Iterator, List, Optional, Tuple
+
+# 超过该长度的文本才缓存格式化结果，短文本直接计算更快
+MEMOIZE_MIN_LENGTH = 256
+
+# 行首标记，用于 str.startswith 的元组参数
+_TITLE_PREFIXES = ('🎯', '🚀', '🌟')
+_TECH_TITLE_PREFIXES = ('📘', '📚', '🎓')
+_LIST_ITEM_PREFIXES = ('🔹', '🔸', '▫️')
+_LIST_PREFIXES = ('🔹', '🔸', '▫️', '-', '*', '•')
+
+# markdown 粗体/斜体标记
+_BOLD_RE = re.compile(r'\*+')
+
+# 连续三个及以上的空白行（仅含空白字符），保留前两个
+_BLANK_LINES_RE = re.compile(r'(\n[^\S\n]*\n[^\S\n]*)(?:\n[^\S\n]*)+(?=\n|\Z)')
 
 class MessageFormatter:
     """消息格式化器"""
@@ -17,44 +34,100 @@ class MessageFormatter:
         r'@undefined',  # 未定义提及
     ]
     
+    # 预编译的正则，避免每条消息重复查找编译缓存
+    # 各模式都以 '@' 开头，提取公共前缀后正则引擎只需在 '@' 处尝试匹配
+    _MENTION_RE = re.compile('@(?:' + '|'.join(p[1:] for p in INVALID_MENTION_PATTERNS) + ')')
+    _WS_RE = re.compile(r'\s+')
+    
+    # 关键信息高亮模式（按顺序逐个替换；各组存在重叠词，如“补货物”，不能合并为单个分支）
+    _KEYWORD_RES = tuple(map(re.compile, (
+        r'(?:采购|生产|销售|调拨|委外|赠品|盘盈|其他)入库',
+        r'(?:标准|无单|ASN预收货|越库)作业',
+        r'(?:原材料|成品|半成品|商品|货物)',
+        r'(?:订单|工单|质检|盘点|补货|退货)',
+    )))
+    
+    # 技术术语高亮模式（同样按顺序逐个替换）
+    _TECH_TERM_RES = tuple(map(re.compile, (
+        r'(?:采购|生产|销售|调拨|委外|赠品|盘盈|其他)入库',
+        r'(?:标准|无单|ASN预收货|越库)作业?',
+        r'(?:原材料|成品|半成品|商品|货物)',
+        r'(?:订单|工单|质检|盘点|补货|退货)',
+        r'(?:WMS|ERP|系统|流程|管理)',
+    )))
+    
+    # 技术术语简化映射（原文 -> 简化表述）
+    _SIMPLIFICATIONS = {
+        '仓储管理(WMS)': '仓储管理',
+        '企业资源规划(ERP)': '企业管理系统',
+        '供应链管理(SCM)': '供应链管理',
+        '生产执行系统(MES)': '生产管理系统',
+    }
+    _SIMPLIFY_RE = re.compile('|'.join(map(re.escape, _SIMPLIFICATIONS)))
+    
     # 内容类型识别
     CONTENT_TYPES = {
-        'list_format': ['|', '----'],
-        'heading_format': ['# ', '## ', '### '],
-        'technical_content': ['系统', '管理', '流程', '操作', '业务'],
-        'simple_content': ['你好', '谢谢', '再见', '帮助']
+        'list_format': ('|', '----'),
+        'heading_format': ('# ', '## ', '### '),
+        'technical_content': ('系统', '管理', '流程', '操作', '业务'),
+        'simple_content': ('你好', '谢谢', '再见', '帮助')
+    }
+    
+    # 移动端紧凑符号映射
+    _MOBILE_TABLE = str.maketrans({'🔹': '•', '🔸': '◦'})
+    
+    # 各内容类别对应的格式化策略（按优先级排列）
+    _CONTENT_TYPE_STRATEGIES = {
+        'list_format': 'technical_detailed',
+        'heading_format': 'structured_info',
+        'technical_content': 'technical_brief',
+        'simple_content': 'simple',
     }
     
+    # 表格标记是单个字符或固定串，直接用子串查找即可
+    _LIST_MARKERS = CONTENT_TYPES['list_format']
+    
+    # 其余类别的指示符合并成一个正则，一次扫描即可确定内容类型
+    _CONTENT_TYPE_RE = re.compile('|'.join(
+        f"(?P<{name}>{'|'.join(map(re.escape, indicators))})"
+        for name, indicators in CONTENT_TYPES.items() if name != 'list_format'
+    ))
+    _CONTENT_TYPE_PRIORITY = {name: i for i, name in enumerate(_CONTENT_TYPE_RE.groupindex)}
+    
     @staticmethod
     def preprocess_message(text: str) -> str:
         """预处理消息，移除无效提及等干扰内容"""
         if not text:
             return text
-            
-        import re
         
-        # 移除无效提及
-        for pattern in MessageFormatter.INVALID_MENTION_PATTERNS:
-            text = re.sub(pattern, '', text)
+        # 移除无效提及（绝大多数消息不含 '@'，子串查找即可跳过正则）
+        if '@' in text:
+            text = MessageFormatter._MENTION_RE.sub('', text)
         
         # 清理多余的空格
-        text = re.sub(r'\s+', ' ', text).strip()
-        
-        return text
+        return MessageFormatter._WS_RE.sub(' ', text).strip()
     
     @staticmethod
     def detect_content_type(text: str) -> str:
         """检测内容类型以选择合适的格式化策略"""
-        if any(indicator in text for indicator in MessageFormatter.CONTENT_TYPES['list_format']):
-            return 'technical_detailed'
-        elif any(indicator in text for indicator in MessageFormatter.CONTENT_TYPES['heading_format']):
-            return 'structured_info'
-        elif any(indicator in text for indicator in MessageFormatter.CONTENT_TYPES['technical_content']):
-            return 'technical_brief'
-        elif any(indicator in text for indicator in MessageFormatter.CONTENT_TYPES['simple_content']):
-            return 'simple'
-        else:
+        for marker in MessageFormatter._LIST_MARKERS:
+            if marker in text:
+                return MessageFormatter._CONTENT_TYPE_STRATEGIES['list_format']
+        
+        priority = MessageFormatter._CONTENT_TYPE_PRIORITY
+        best = None
+        
+        for match in MessageFormatter._CONTENT_TYPE_RE.finditer(text):
+            name = match.lastgroup
+            if best is None or priority[name] < priority[best]:
+                best = name
+                if priority[name] == 0:
+                    # 已命中最高优先级，无需继续扫描
+                    break
+        
+        if best is None:
             return 'general'
+        return MessageFormatter._CONTENT_TYPE_STRATEGIES[best]
     
     @staticmethod
     def optimize_readability(text: str, content_type: str = None) -> str:
@@ -68,7 +141,15 @@ class MessageFormatter:
         """
         if not text:
             return text
-            
+        
+        # 较长文本的格式化开销大于缓存查找，命中缓存时直接返回
+        if len(text) > MEMOIZE_MIN_LENGTH:
+            return _cached_optimize_readability(text, content_type)
+        return MessageFormatter._optimize_readability(text, content_type)
+    
+    @staticmethod
+    def _optimize_readability(text: str, content_type: str = None) -> str:
+        """按内容类型执行格式化（不经过缓存）"""
         # 自动检测内容类型
         if content_type is None:
             content_type = MessageFormatter.detect_content_type(text)
@@ -85,98 +166,111 @@ class MessageFormatter:
             text = MessageFormatter._process_technical_brief(text)
         else:
             # 通用处理 - 即使是简单文本也会进行基础优化
-            text = MessageFormatter._basic_formatting(text)
-            text = MessageFormatter._optimize_headings(text)
-            text = MessageFormatter._add_paragraph_spacing(text)
-            text = MessageFormatter._highlight_key_info(text)
-            text = MessageFormatter._clean_extra_whitespace(text)
+            text = '\n'.join(MessageFormatter._single_pass_format(text, content_type))
+            text = MessageFormatter._highlight_key_info(text).strip()
         
         return text
     
     @staticmethod
-    def _basic_formatting(text: str) -> str:
-        """基础格式化 - 为所有文本提供最小优化"""
-        lines = text.split('\n')
-        result_lines = []
+    def _single_pass_format(text: str, content_type: str) -> Iterator[str]:
+        """
+        单次遍历完成基础格式化、标题优化、段落间距和空行清理
         
-        for line in lines:
-            stripped = line.strip()
-            if stripped:
-                # 为短句添加轻微的格式化
-                if len(stripped) < 50 and not any(char in stripped for char in ['#', '|', '-', '*']):
-                    # 简单的问候语或短句优化
-                    if any(word in stripped.lower() for word in ['你好', 'hello', 'hi', '您好', '测试']):
-                        result_lines.append(f"👋 {stripped}")
-                    else:
-                        result_lines.append(stripped)
-                else:
-                    result_lines.append(stripped)
-            else:
-                result_lines.append("")
+        结果与依次执行基础格式化（仅通用内容）、_optimize_headings、
+        _add_paragraph_spacing、_clean_extra_whitespace 相同，但只拆分一次文本。
+        关键词高亮不跨行，由调用方对拼接结果统一处理。
+        """
+        basic = content_type != 'structured_info'
+        prev_stripped = ''    # 标题处理后的上一行（已去除首尾空白）
+        empty_run = 0
         
-        return '\n'.join(result_lines)
+        for raw_line in text.split('\n'):
+            if basic:
+                raw_line = MessageFormatter._basic_format_line(raw_line)
+            
+            for line in MessageFormatter._heading_lines(raw_line):
+                stripped = line.strip()
+                spaced = []
+                
+                # 在主要分类之间添加额外间距
+                if stripped.startswith(_TITLE_PREFIXES) and prev_stripped:
+                    spaced.append('')
+                
+                # 如果前一行不是列表项，则在列表项前添加空行
+                if (stripped.startswith(_LIST_ITEM_PREFIXES) and prev_stripped and
+                        not prev_stripped.startswith(_LIST_PREFIXES)):
+                    spaced.append('')
+                
+                spaced.append(line)
+                prev_stripped = stripped
+                
+                # 最多保留两个连续空行
+                for out in spaced:
+                    if out.strip() == '':
+                        empty_run += 1
+                        if empty_run <= 2:
+                            yield out
+                    else:
+                        empty_run = 0
+                        yield out
+    
+    @staticmethod
+    def _basic_format_line(line: str) -> str:
+        """基础格式化单行 - 为所有文本提供最小优化"""
+        stripped = line.strip()
+        # 为短句添加轻微的格式化
+        if stripped and len(stripped) < 50 and not any(char in stripped for char in ['#', '|', '-', '*']):
+            # 简单的问候语或短句优化
+            if any(word in stripped.lower() for word in ['你好', 'hello', 'hi', '您好', '测试']):
+                return f"👋 {stripped}"
+        return stripped
+    
+    @staticmethod
+    def _heading_lines(line: str) -> List[str]:
+        """将单行转换为标题格式，返回展开后的行"""
+        stripped = line.strip()
+        
+        if stripped.startswith('###'):
+            # 三级标题 - 主要分类
+            title = stripped[3:].strip()
+            return ['', f"🎯 {title}", "═" * (len(title) + 2)]
+        elif stripped.startswith('##'):
+            # 二级标题 - 大分类
+            title = stripped[2:].strip()
+            return ['', f"🚀 {title}", "━" * (len(title) + 2)]
+        elif stripped.startswith('#'):
+            # 一级标题 - 主标题
+            title = stripped[1:].strip()
+            return ['', f"🌟 {title}", "━" * (len(title) + 2)]
+        return [line]
     @staticmethod
     def _process_technical_detailed(text: str) -> str:
         """处理详细技术内容"""
-        # 专门针对技术文档的优化
-        text = MessageFormatter._convert_tables_to_readable_lists(text)
-        text = MessageFormatter._optimize_technical_headings(text)
-        text = MessageFormatter._add_technical_spacing(text)
-        text = MessageFormatter._enhance_technical_formatting(text)
+        # 专门针对技术文档的优化，各步骤之间直接传递行列表
+        lines = text.split('\n')
+        lines = MessageFormatter._convert_tables_to_readable_lists(lines)
+        lines = MessageFormatter._optimize_technical_headings(lines)
+        lines = MessageFormatter._add_technical_spacing(lines)
+        text = MessageFormatter._enhance_technical_formatting('\n'.join(lines))
         return MessageFormatter._clean_extra_whitespace(text)
     
     @staticmethod
     def _process_structured_info(text: str) -> str:
         """处理结构化信息"""
-        text = MessageFormatter._optimize_headings(text)
-        text = MessageFormatter._add_paragraph_spacing(text)
-        text = MessageFormatter._highlight_key_info(text)
-        return MessageFormatter._clean_extra_whitespace(text)
+        text = '\n'.join(MessageFormatter._single_pass_format(text, 'structured_info'))
+        return MessageFormatter._highlight_key_info(text).strip()
     
     @staticmethod
     def _process_technical_brief(text: str) -> str:
         """处理简要技术内容"""
         text = MessageFormatter._simplify_technical_terms(text)
-        text = MessageFormatter._optimize_headings(text)
-        text = MessageFormatter._add_paragraph_spacing(text)
-        return MessageFormatter._clean_extra_whitespace(text)
-        """将表格格式转换为列表格式"""
-        lines = text.split('\n')
-        result_lines = []
-        i = 0
-        
-        while i < len(lines):
-            line = lines[i].strip()
-            
-            # 检测表格头部（包含多个|分隔符的行）
-            if '|' in line and line.count('|') >= 2:
-                # 收集连续的表格行
-                table_lines = []
-                j = i
-                
-                # 向前查找表格结束
-                while j < len(lines) and ('|' in lines[j] or lines[j].strip() == '' or 
-                                        lines[j].startswith('-') or lines[j].startswith('----')):
-                    if '|' in lines[j] and lines[j].strip() != '':
-                        table_lines.append(lines[j].strip())
-                    j += 1
-                
-                if len(table_lines) > 1:
-                    # 转换表格为列表
-                    converted = MessageFormatter._table_to_list(table_lines)
-                    result_lines.extend(converted)
-                    i = j  # 跳过已处理的表格行
-                    continue
-            
-            result_lines.append(line)
-            i += 1
-        
-        return '\n'.join(result_lines)
+        lines = MessageFormatter._optimize_headings(text.split('\n'))
+        lines = MessageFormatter._add_paragraph_spacing(lines)
+        return MessageFormatter._clean_extra_whitespace('\n'.join(lines))
     
     @staticmethod
-    def _convert_tables_to_readable_lists(text: str) -> str:
+    def _convert_tables_to_readable_lists(lines: List[str]) -> List[str]:
         """将表格格式转换为列表格式"""
-        lines = text.split('\n')
         result_lines = []
         i = 0
         
@@ -206,7 +300,7 @@ class MessageFormatter:
             result_lines.append(line)
             i += 1
         
-        return '\n'.join(result_lines)
+        return result_lines
     
     @staticmethod
     def _table_to_list(table_lines: List[str]) -> List[str]:
@@ -217,129 +311,88 @@ class MessageFormatter:
         result = []
         
         # 第一行通常是标题
-        header = table_lines[0]
-        cells = [cell.strip() for cell in header.split('|') if cell.strip()]
+        category_title, description_title = MessageFormatter._leading_cells(table_lines[0])
         
-        if len(cells) >= 2:
+        if description_title:
             # 添加分类标题
-            category_title = cells[0] if len(cells) > 0 else "项目"
-            description_title = cells[1] if len(cells) > 1 else "说明"
-            
-            result.append(f"\n📌 {category_title} | {description_title}")
+            result.append("")
+            result.append(f"📌 {category_title} | {description_title}")
             result.append("─" * 30)
             
             # 处理数据行
             for line in table_lines[1:]:
                 if '|' in line and not line.startswith('----'):
-                    parts = [part.strip() for part in line.split('|') if part.strip() and not part.strip().startswith('----')]
-                    if len(parts) >= 2:
-                        item = parts[0]
-                        desc = parts[1]
+                    # 只保留前两列，忽略典型场景等额外信息
+                    item, desc = MessageFormatter._leading_cells(line, skip_separators=True)
+                    if desc:
                         # 移除markdown粗体标记以便重新格式化
-                        item_clean = item.replace('**', '').replace('*', '')
-                        # 只保留第一个描述部分，忽略典型场景等额外信息
-                        desc_main = desc.split('|')[0].strip()
-                        # 清理描述中的多余格式
-                        desc_clean = desc_main.replace('**', '').replace('*', '')
+                        item_clean = _BOLD_RE.sub('', item)
+                        desc_clean = _BOLD_RE.sub('', desc)
                         result.append(f"🔹 **{item_clean}** - {desc_clean}")
         
         return result
     
     @staticmethod
-    def _optimize_headings(text: str) -> str:
+    def _leading_cells(line: str, skip_separators: bool = False) -> Tuple[str, str]:
+        """取出表格行中前两个非空单元格，不拆分整行"""
+        cells = []
+        rest = line
+        while rest and len(cells) < 2:
+            cell, _, rest = rest.partition('|')
+            cell = cell.strip()
+            if cell and not (skip_separators and cell.startswith('----')):
+                cells.append(cell)
+        cells.extend([''] * (2 - len(cells)))
+        return cells[0], cells[1]
+    
+    @staticmethod
+    def _optimize_headings(lines: List[str]) -> List[str]:
         """优化标题层级和格式"""
-        lines = text.split('\n')
         result_lines = []
-        
         for line in lines:
-            stripped = line.strip()
-            
-            # 处理不同级别的标题
-            if stripped.startswith('###'):
-                # 三级标题 - 主要分类
-                title = stripped[3:].strip()
-                result_lines.append(f"\n🎯 {title}")
-                result_lines.append("═" * (len(title) + 2))
-            elif stripped.startswith('##'):
-                # 二级标题 - 大分类
-                title = stripped[2:].strip()
-                result_lines.append(f"\n🚀 {title}")
-                result_lines.append("━" * (len(title) + 2))
-            elif stripped.startswith('#'):
-                # 一级标题 - 主标题
-                title = stripped[1:].strip()
-                result_lines.append(f"\n🌟 {title}")
-                result_lines.append("━" * (len(title) + 2))
-            else:
-                result_lines.append(line)
-        
-        return '\n'.join(result_lines)
+            result_lines.extend(MessageFormatter._heading_lines(line))
+        return result_lines
     
     @staticmethod
-    def _add_paragraph_spacing(text: str) -> str:
+    def _add_paragraph_spacing(lines: List[str]) -> List[str]:
         """添加适当的段落间距"""
-        lines = text.split('\n')
         result_lines = []
+        prev_stripped = ''
         
-        for i, line in enumerate(lines):
+        for line in lines:
             stripped = line.strip()
             
             # 在主要分类之间添加额外间距
-            if stripped.startswith('🎯') or stripped.startswith('🚀') or stripped.startswith('🌟'):
-                if i > 0 and result_lines and not result_lines[-1].strip() == '':
-                    result_lines.append('')  # 在标题前添加空行
+            if stripped.startswith(_TITLE_PREFIXES) and prev_stripped:
+                result_lines.append('')  # 在标题前添加空行
             
             # 在列表项之间保持适当间距
-            if stripped.startswith('🔹') or stripped.startswith('🔸') or stripped.startswith('▫️'):
+            if stripped.startswith(_LIST_ITEM_PREFIXES):
                 # 如果前一行不是列表项，则添加空行
-                if (i > 0 and lines[i-1].strip() and 
-                    not lines[i-1].strip().startswith(('🔹', '🔸', '▫️', '-', '*', '•'))):
+                if prev_stripped and not prev_stripped.startswith(_LIST_PREFIXES):
                     result_lines.append('')
             
             result_lines.append(line)
+            prev_stripped = stripped
         
-        return '\n'.join(result_lines)
+        return result_lines
     
     @staticmethod
     def _highlight_key_info(text: str) -> str:
         """突出关键信息"""
-        # 关键词高亮
-        keywords = [
-            r'(?:采购|生产|销售|调拨|委外|赠品|盘盈|其他)入库',
-            r'(?:标准|无单|ASN预收货|越库)作业',
-            r'(?:原材料|成品|半成品|商品|货物)',
-            r'(?:订单|工单|质检|盘点|补货|退货)',
-        ]
-        
-        for keyword_pattern in keywords:
-            # 使用更温和的强调方式，避免过度格式化
-            text = re.sub(keyword_pattern, r'**\g<0>**', text)
-        
+        # 关键词高亮，使用更温和的强调方式，避免过度格式化
+        for keyword_re in MessageFormatter._KEYWORD_RES:
+            text = keyword_re.sub(r'**\g<0>**', text)
         return text
     
     @staticmethod
     def _clean_extra_whitespace(text: str) -> str:
-        """清理多余的空白行"""
-        lines = text.split('\n')
-        result_lines = []
-        empty_line_count = 0
-        
-        for line in lines:
-            if line.strip() == '':
-                empty_line_count += 1
-                # 最多保留两个连续空行
-                if empty_line_count <= 2:
-                    result_lines.append(line)
-            else:
-                empty_line_count = 0
-                result_lines.append(line)
-        
-        return '\n'.join(result_lines).strip()
+        """清理多余的空白行，最多保留两个连续空行"""
+        return _BLANK_LINES_RE.sub(r'\1', text).strip()
     
     @staticmethod
-    def _optimize_technical_headings(text: str) -> str:
+    def _optimize_technical_headings(lines: List[str]) -> List[str]:
         """优化技术文档标题"""
-        lines = text.split('\n')
         result_lines = []
         
         for line in lines:
@@ -347,77 +400,61 @@ class MessageFormatter:
             
             if stripped.startswith('###'):
                 title = stripped[3:].strip()
-                result_lines.append(f"\n📘 {title}")
+                result_lines.append("")
+                result_lines.append(f"📘 {title}")
                 result_lines.append("─" * min(len(title) + 2, 40))
             elif stripped.startswith('##'):
                 title = stripped[2:].strip()
-                result_lines.append(f"\n📚 {title}")
+                result_lines.append("")
+                result_lines.append(f"📚 {title}")
                 result_lines.append("═" * min(len(title) + 2, 50))
             elif stripped.startswith('#'):
                 title = stripped[1:].strip()
-                result_lines.append(f"\n🎓 {title}")
+                result_lines.append("")
+                result_lines.append(f"🎓 {title}")
                 result_lines.append("═" * min(len(title) + 2, 60))
             else:
                 result_lines.append(line)
         
-        return '\n'.join(result_lines)
+        return result_lines
     
     @staticmethod
-    def _add_technical_spacing(text: str) -> str:
+    def _add_technical_spacing(lines: List[str]) -> List[str]:
         """为技术内容添加适当间距"""
-        lines = text.split('\n')
         result_lines = []
+        prev_stripped = ''
         
-        for i, line in enumerate(lines):
+        for line in lines:
             stripped = line.strip()
             
             # 在主要分类标题前后添加间距
-            if stripped.startswith(('📘', '📚', '🎓')):
-                if i > 0 and result_lines and not result_lines[-1].strip() == '':
-                    result_lines.append('')
+            if stripped.startswith(_TECH_TITLE_PREFIXES) and prev_stripped:
+                result_lines.append('')
                 
             # 在列表项之间添加适当间距
             if stripped.startswith('🔹'):
-                if (i > 0 and lines[i-1].strip() and 
-                    not lines[i-1].strip().startswith(('🔹', '🔸', '▫️', '-', '*', '•'))):
+                if prev_stripped and not prev_stripped.startswith(_LIST_PREFIXES):
                     result_lines.append('')
             
             result_lines.append(line)
+            prev_stripped = stripped
         
-        return '\n'.join(result_lines)
+        return result_lines
     
     @staticmethod
     def _enhance_technical_formatting(text: str) -> str:
         """增强技术内容格式化"""
         # 技术术语高亮
-        tech_terms = [
-            r'(?:采购|生产|销售|调拨|委外|赠品|盘盈|其他)入库',
-            r'(?:标准|无单|ASN预收货|越库)作业?',
-            r'(?:原材料|成品|半成品|商品|货物)',
-            r'(?:订单|工单|质检|盘点|补货|退货)',
-            r'(?:WMS|ERP|系统|流程|管理)',
-        ]
-        
-        for term_pattern in tech_terms:
-            text = re.sub(term_pattern, r'**\g<0>**', text)
-        
+        for term_re in MessageFormatter._TECH_TERM_RES:
+            text = term_re.sub(r'**\g<0>**', text)
         return text
     
     @staticmethod
     def _simplify_technical_terms(text: str) -> str:
         """简化技术术语表达"""
-        # 将复杂的技术表述简化
-        simplifications = {
-            r'仓储管理\(WMS\)': '仓储管理',
-            r'企业资源规划\(ERP\)': '企业管理系统',
-            r'供应链管理\(SCM\)': '供应链管理',
-            r'生产执行系统\(MES\)': '生产管理系统',
-        }
-        
-        for pattern, replacement in simplifications.items():
-            text = re.sub(pattern, replacement, text)
-        
-        return text
+        # 将复杂的技术表述简化（一次扫描完成全部替换）
+        simplifications = MessageFormatter._SIMPLIFICATIONS
+        return MessageFormatter._SIMPLIFY_RE.sub(lambda m: simplifications[m.group()], text)
     
     @staticmethod
     def format_for_mobile(text: str) -> str:
@@ -425,37 +462,27 @@ class MessageFormatter:
         为移动端优化格式
         特点：更简洁、更适合小屏幕阅读
         """
-        # 使用更紧凑的格式
-        text = text.replace('🔹', '•')
-        text = text.replace('🔸', '◦')
-        text = text.replace('▫️', '▪')
+        # 使用更紧凑的格式（▫️ 带变体选择符，无法放入单字符映射表）
+        text = text.translate(MessageFormatter._MOBILE_TABLE).replace('▫️', '▪')
         
         # 缩短长行
-        lines = text.split('\n')
         result_lines = []
         
-        for line in lines:
+        for line in text.split('\n'):
             if len(line) > 80:  # 对于长行进行软换行
-                # 简单的单词边界换行
-                words = line.split()
-                current_line = ""
-                for word in words:
-                    if len(current_line + word) > 75:
-                        if current_line:
-                            result_lines.append(current_line)
-                            current_line = word
-                        else:
-                            result_lines.append(word[:75] + "...")
-                            current_line = word[75:] if len(word) > 75 else ""
-                    else:
-                        current_line = current_line + " " + word if current_line else word
-                if current_line:
-                    result_lines.append(current_line)
+                result_lines.extend(textwrap.wrap(
+                    line, width=75, break_long_words=True, break_on_hyphens=False
+                ) or [''])
             else:
                 result_lines.append(line)
         
         return '\n'.join(result_lines)
 
+@lru_cache(maxsize=512)
+def _cached_optimize_readability(text: str, content_type: Optional[str]) -> str:
+    """缓存 optimize_readability 的结果，格式化对 (text, content_type) 是确定性的"""
+    return MessageFormatter._optimize_readability(text, content_type)
+
 # 使用示例和测试
 if __name__ == "__main__":
     # 测试原始文本（来自截图）
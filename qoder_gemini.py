@@ -3,12 +3,16 @@
 Qoder Gemini服务 - 使用Google Gemini作为AI后端
 """
 
-from flask import Flask, request, jsonify
+from flask import Flask, Response, request, jsonify
 import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
 import json
 import logging
 import os
 from dotenv import load_dotenv
+from llm_cache import LLMCache
+from llm_utils import sse_events, truncate_json
 
 load_dotenv()
 
@@ -24,47 +28,92 @@ GEMINI_MODEL = os.getenv("GEMINI_MODEL", "gemini-pro")
 # Gemini API使用v1beta版本
 GEMINI_API_BASE = "https://generativelanguage.googleapis.com/v1beta"
 GEMINI_API_URL = f"{GEMINI_API_BASE}/models/{GEMINI_MODEL}:generateContent"
+GEMINI_STREAM_URL = f"{GEMINI_API_BASE}/models/{GEMINI_MODEL}:streamGenerateContent"
+# 带 key 的完整请求地址在导入时拼接一次
+_GEMINI_URL = f"{GEMINI_API_URL}?key={GEMINI_API_KEY}"
+_GEMINI_STREAM_URL = f"{GEMINI_STREAM_URL}?alt=sse&key={GEMINI_API_KEY}"  # alt=sse 让 Gemini 以 SSE 逐段返回
+
+# 生成参数在运行期不变，所有请求共用同一个字典
+_GEN_CFG = {
+    "temperature": 0.7,
+    "topK": 40,
+    "topP": 0.95,
+    "maxOutputTokens": 1024,
+}
+
+# 复用连接池的全局会话，避免每次请求都重新进行 TCP/TLS 握手
+SESSION = requests.Session()
+SESSION.headers.update({"Content-Type": "application/json"})
+SESSION.mount("https://", HTTPAdapter(
+    pool_connections=10,
+    pool_maxsize=50,
+    max_retries=Retry(
+        total=3,
+        read=False,  # 读超时说明上游已在生成，重发会重复计费，直接抛出 ReadTimeout
+        backoff_factor=0.5,
+        # 只重试限流和服务不可用：这两种状态表示请求未被处理；500/502/504 可能在上游已生成（已计费）后才返回
+        status_forcelist=[429, 503],
+        raise_on_status=False,  # 重试用尽后返回最后的响应，交给 raise_for_status 按 HTTP 错误处理
+        allowed_methods=frozenset({"POST"}),  # 仅重试连接失败和上述状态码
+    ),
+))
+
+# 相同对话上下文的回复缓存，重复提问（如“你好”“帮助”）不再请求上游
+_reply_cache = LLMCache(maxsize=2048, ttl=3600)
+
+def _build_contents(message, history=None):
+    """构建Gemini对话内容（最近5轮历史 + 当前消息）"""
+    contents = [
+        {
+            "role": "user" if msg.get("role") == "user" else "model",
+            "parts": [{"text": msg.get("content", "")}]
+        }
+        for msg in (history or [])[-5:]  # 最近5轮对话
+    ]
+    
+    # 添加当前消息
+    contents.append({
+        "role": "user",
+        "parts": [{"text": message}]
+    })
+    return contents
 
 def call_gemini_api(message, history=None):
     """调用Gemini API"""
     try:
         # 构建对话内容
-        contents = []
-        
-        # 添加历史对话
-        if history and len(history) > 0:
-            for msg in history[-5:]:  # 最近5轮对话
-                role = "user" if msg.get("role") == "user" else "model"
-                contents.append({
-                    "role": role,
-                    "parts": [{"text": msg.get("content", "")}]
-                })
-        
-        # 添加当前消息
-        contents.append({
-            "role": "user",
-            "parts": [{"text": message}]
-        })
+        contents = _build_contents(message, history)
         
+        cache_key = LLMCache.make_key(GEMINI_MODEL, contents)
+        cached = _reply_cache.get(cache_key)
+        if cached is not None:
+            logger.info("⚡ 命中回复缓存")
+            return cached
+        
+        # 相同对话并发到达时只请求一次上游，其余请求复用结果
+        return _reply_cache.single_flight(cache_key, lambda: _request_gemini(contents, cache_key))
+        
+    except Exception as e:
+        logger.error(f"Gemini API错误: {e}")
+        return "抱歉，处理您的请求时出现了错误。"
+
+def _request_gemini(contents, cache_key):
+    """请求Gemini API，成功时写入回复缓存"""
+    try:
         # 构建请求
         payload = {
             "contents": contents,
-            "generationConfig": {
-                "temperature": 0.7,
-                "topK": 40,
-                "topP": 0.95,
-                "maxOutputTokens": 1024,
-            }
+            "generationConfig": _GEN_CFG
         }
         
         # 发送请求
-        url = f"{GEMINI_API_URL}?key={GEMINI_API_KEY}"
-        response = requests.post(url, json=payload, timeout=30)
+        response = SESSION.post(_GEMINI_URL, json=payload, timeout=30)
         response.raise_for_status()
         
         # 解析响应
         result = response.json()
-        logger.info(f"Gemini API原始响应: {json.dumps(result, ensure_ascii=False)[:300]}")
+        if logger.isEnabledFor(logging.DEBUG):
+            logger.debug(f"Gemini API原始响应: {truncate_json(result, 300)}")
         
         # 检查是否有candidates字段
         if "candidates" not in result or len(result["candidates"]) == 0:
@@ -75,6 +124,8 @@ def call_gemini_api(message, history=None):
         candidate = result["candidates"][0]
         if "content" in candidate and "parts" in candidate["content"]:
             text = candidate["content"]["parts"][0].get("text", "")
+            if text:
+                _reply_cache.set(cache_key, text)
             return text
         
         logger.warning(f"Gemini返回格式异常: {result}")
@@ -87,6 +138,52 @@ def call_gemini_api(message, history=None):
         logger.error(f"Gemini API错误: {e}")
         return "抱歉，处理您的请求时出现了错误。"
 
+def stream_gemini_api(message, history=None):
+    """流式调用Gemini API，逐段产出回复文本"""
+    try:
+        contents = _build_contents(message, history)
+        cache_key = LLMCache.make_key(GEMINI_MODEL, contents)
+        cached = _reply_cache.get(cache_key)
+        if cached is not None:
+            logger.info("⚡ 命中回复缓存")
+            yield cached
+            return
+        
+        payload = {
+            "contents": contents,
+            "generationConfig": _GEN_CFG
+        }
+        
+        parts = []
+        with SESSION.post(_GEMINI_STREAM_URL, json=payload, timeout=30, stream=True) as response:
+            response.raise_for_status()
+            response.encoding = "utf-8"
+            
+            for line in response.iter_lines(decode_unicode=True):
+                if not line or not line.startswith("data:"):
+                    continue
+                candidates = json.loads(line[5:].strip()).get("candidates") or []
+                if not candidates:
+                    continue
+                for part in (candidates[0].get("content") or {}).get("parts", []):
+                    text = part.get("text")
+                    if text:
+                        parts.append(text)
+                        yield text
+        
+        text = "".join(parts)
+        if text:
+            _reply_cache.set(cache_key, text)
+        else:
+            yield "抱歉，我暂时无法回答这个问题。"
+        
+    except requests.exceptions.RequestException as e:
+        logger.error(f"Gemini API流式请求失败: {e}")
+        yield f"抱歉，AI服务暂时不可用。错误信息: {str(e)}"
+    except Exception as e:
+        logger.error(f"Gemini API错误: {e}")
+        yield "抱歉，处理您的请求时出现了错误。"
+
 @app.route('/api/chat', methods=['POST'])
 def chat_api():
     """Gemini AI聊天API接口"""
@@ -107,6 +204,10 @@ def chat_api():
                 "status": "error"
             }), 500
         
+        # 请求方声明 stream=true 时以 SSE 逐段返回，首段文字无需等待完整生成
+        if data.get('stream'):
+            return Response(sse_events(stream_gemini_api(message, history)), mimetype="text/event-stream")
+        
         # 调用Gemini API
         reply = call_gemini_api(message, history)
         
@@ -148,6 +249,7 @@ if __name__ == '__main__':
     print(f"📡 API地址: http://localhost:8081/api/chat")
     print(f"🧠 模型: {GEMINI_MODEL}")
     print(f"🔑 API Key: {'已配置 ✅' if GEMINI_API_KEY else '未配置 ❌'}")
+    print("🚀 生产环境请使用: gunicorn -c gunicorn_conf.py qoder_gemini:app")
     print("=" * 60)
     
     if not GEMINI_API_KEY:
@@ -7,6 +7,8 @@ Qoder Mock服务 - 模拟Qoder AI智能体API
 from flask import Flask, request, jsonify
 import json
 import logging
+import re
+import zlib
 
 app = Flask(__name__)
 
@@ -14,21 +16,58 @@ app = Flask(__name__)
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
+# 关键词按标签分组；基本意图按优先级排列，匹配时取第一个命中的意图
+_KEYWORD_GROUPS = (
+    ("followup", ('为什么', 'why', '怎么', 'how', '呢')),
+    ("recall", ('说了什么', '前面')),
+    ("short", ('哦', '好', '对', '是', '然后')),
+    ("greet", ('你好', 'hello', 'hi', '您好')),
+    ("weather", ('天气', 'temperature', 'weather')),
+    ("help", ('帮助', 'help', '功能', '能力')),
+    ("thanks", ('谢谢', '感谢', 'thank')),
+    ("bye", ('再见', '拜拜', 'bye')),
+)
+_INTENT_MAP = {word: tag for tag, words in _KEYWORD_GROUPS for word in words}
+
+# 所有关键词合并为一个正则，零宽前瞻让重叠的关键词（如“你好”中的“好”）也能被找到，
+# 一次扫描即可得到消息命中的全部标签
+_KEYWORD_RE = re.compile('(?=(' + '|'.join(re.escape(word) for _, words in _KEYWORD_GROUPS for word in words) + '))')
+_QUESTION_PREFIXES = ('什么', '哪些', 'what', 'which')
+
+# 基本意图回复，顺序即优先级
+_INTENT_REPLIES = (
+    ("greet", "您好！我是Qoder AI助手，很高兴为您服务。我可以帮助您解答问题、提供信息和协助处理各种任务。有什么我可以帮您的吗？"),
+    ("weather", "我目前无法获取实时天气信息，但建议您可以查看天气预报应用获取准确的天气数据。"),
+    ("help", "我是一个AI助手，可以帮您：\n\n• 回答各类问题\n• 提供信息查询\n• 进行智能对话\n• 协助解决问题\n\n请随时告诉我您的需求！"),
+    ("thanks", "不客气！很高兴能帮到您。如果您还有其他问题，随时告诉我哦！"),
+    ("bye", "再见！希望我们的对话对您有帮助。期待下次为您服务！"),
+)
+
+# 通用AI风格回复模板
+_FALLBACK_TEMPLATES = (
+    "我理解您说的是：‘{message}’。这是一个很有趣的问题，让我思考一下...",
+    "关于‘{message}’，我的看法是...",
+    "您提到‘{message}’，这让我想到了一些相关的知识点...",
+    "对于‘{message}’这个问题，我认为可以从几个角度来分析...",
+    "感谢您分享‘{message}’，我很乐意就此与您深入探讨。",
+)
+
 # 模拟AI回复（支持对话历史）
 def get_ai_response(message, history=None):
     """根据消息内容和对话历史返回AI风格的回复"""
     message_lower = message.lower()
+    tags = {_INTENT_MAP[m.group(1)] for m in _KEYWORD_RE.finditer(message_lower)}
     
     # 如果有对话历史，先尝试上下文理解
     if history and len(history) > 0:
         # 获取最近的对话
         last_messages = history[-3:]  # 最近3轮对话
-        context_text = "\n".join([f"{msg.get('role', 'user')}: {msg.get('content', '')}" for msg in last_messages])
+        context_text = "\n".join(f"{msg.get('role', 'user')}: {msg.get('content', '')}" for msg in last_messages)
         
         logger.info(f"对话上下文:\n{context_text}")
         
         # 处理后续问题（基于上下文）
-        if any(word in message_lower for word in ['为什么', 'why', '怎么', 'how', '呢']):
+        if "followup" in tags:
             # 查找上一条assistant的回复
             for msg in reversed(last_messages):
                 if msg.get('role') == 'assistant':
@@ -36,7 +75,7 @@ def get_ai_response(message, history=None):
                     return f"我刚才提到“{prev_reply[:30]}...”。具体来说，这是因为目前的技术限制。作为AI助手，我的能力主要集中在文本对话和信息提供上。对于实时数据（如天气、新闻等），需要调用专门的API接口。"
             
         # 处理"什么xxx"类型的问题
-        if message_lower.startswith(('什么', '哪些', 'what', 'which')) or '说了什么' in message_lower or '前面' in message_lower:
+        if message_lower.startswith(_QUESTION_PREFIXES) or "recall" in tags:
             # 查找上一条user的消息
             user_messages = [msg for msg in last_messages if msg.get('role') == 'user']
             if len(user_messages) > 1:
@@ -56,37 +95,17 @@ def get_ai_response(message, history=None):
                     break
         
         # 处理简短的后续问题
-        if len(message) <= 5 and any(word in message_lower for word in ['哦', '好', '对', '是', '然后']):
+        if len(message) <= 5 and "short" in tags:
             return "明白了！您还有其他问题吗？我很乐意继续为您解答。"
     
-    # 基本关键词匹配（原有逻辑）
-    if any(word in message_lower for word in ['你好', 'hello', 'hi', '您好']):
-        return "您好！我是Qoder AI助手，很高兴为您服务。我可以帮助您解答问题、提供信息和协助处理各种任务。有什么我可以帮您的吗？"
-    
-    elif any(word in message_lower for word in ['天气', 'temperature', 'weather']):
-        return "我目前无法获取实时天气信息，但建议您可以查看天气预报应用获取准确的天气数据。"
+    # 基本关键词匹配（按优先级取第一个命中的意图）
+    for intent, reply in _INTENT_REPLIES:
+        if intent in tags:
+            return reply
     
-    elif any(word in message_lower for word in ['帮助', 'help', '功能', '能力']):
-        return "我是一个AI助手，可以帮您：\n\n• 回答各类问题\n• 提供信息查询\n• 进行智能对话\n• 协助解决问题\n\n请随时告诉我您的需求！"
-    
-    elif any(word in message_lower for word in ['谢谢', '感谢', 'thank']):
-        return "不客气！很高兴能帮到您。如果您还有其他问题，随时告诉我哦！"
-    
-    elif any(word in message_lower for word in ['再见', '拜拜', 'bye']):
-        return "再见！希望我们的对话对您有帮助。期待下次为您服务！"
-    
-    else:
-        # 通用AI风格回复
-        responses = [
-            f"我理解您说的是：‘{message}’。这是一个很有趣的问题，让我思考一下...",
-            f"关于‘{message}’，我的看法是...",
-            f"您提到‘{message}’，这让我想到了一些相关的知识点...",
-            f"对于‘{message}’这个问题，我认为可以从几个角度来分析...",
-            f"感谢您分享‘{message}’，我很乐意就此与您深入探讨。"
-        ]
-        
-        import random
-        return responses[hash(message) % len(responses)]
+    # 通用AI风格回复（crc32 跨进程稳定，同一消息在任何 worker 上都得到同一条回复）
+    index = zlib.crc32(message.encode('utf-8')) % len(_FALLBACK_TEMPLATES)
+    return _FALLBACK_TEMPLATES[index].format(message=message)
 
 @app.route('/api/chat', methods=['POST'])
 def chat_api():
@@ -132,5 +151,6 @@ if __name__ == '__main__':
     print("=" * 50)
     print("Qoder Mock服务启动中...")
     print("API地址: http://localhost:8081/api/chat")
+    print("🚀 生产环境请使用: gunicorn -c gunicorn_conf.py qoder_mock:app")
     print("=" * 50)
     app.run(host='0.0.0.0', port=8081, debug=False)
\ No newline at end of file
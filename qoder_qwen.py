@@ -4,14 +4,19 @@ Qoder 通义千问服务 - 使用阿里云千问模型作为AI后端
 连接心流平台 (api.xinliudada.com)
 """
 
-from flask import Flask, request, jsonify
+from flask import Flask, Response, request, jsonify
 import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
 import json
 import logging
 import os
+import random
 import time
 from dotenv import load_dotenv
 import urllib3
+from llm_cache import LLMCache
+from llm_utils import sse_events, truncate_json
 
 # 禁用SSL警告（用于测试心流平台）
 urllib3.disable_warnings(urllib3.exceptions.InsecureRequestWarning)
@@ -29,28 +34,79 @@ QWEN_API_KEY = os.getenv("QWEN_API_KEY", "")
 QWEN_MODEL = os.getenv("QWEN_MODEL", "tstars2.0")  # 默认模型，可在.env中修改
 # 心流平台的千问API端点（注意是 apis 不是 api）
 QWEN_API_URL = "https://apis.iflow.cn/v1/chat/completions"
+QWEN_MAX_RETRIES = 3  # 连接错误的最大重试次数
 
-def call_qwen_api(message, history=None, retry_count=0):
+# 复用连接池的全局会话，避免每次请求都重新进行 TCP/TLS 握手
+SESSION = requests.Session()
+# 请求头在运行期不变，导入时一次性挂到会话上，每次调用无需再构造
+SESSION.headers.update({
+    "Content-Type": "application/json",
+    "Authorization": f"Bearer {QWEN_API_KEY}"
+})
+SESSION.mount("https://", HTTPAdapter(
+    pool_connections=10,
+    pool_maxsize=50,
+    max_retries=Retry(
+        total=3,
+        connect=0,  # 连接失败由 _request_qwen 的退避循环负责重试，避免两层重试叠加
+        read=False,  # 读超时说明上游已在生成，重发会重复计费，直接抛出 ReadTimeout
+        backoff_factor=0.5,
+        # 只重试限流和服务不可用：这两种状态表示请求未被处理；500/502/504 可能在上游已生成（已计费）后才返回
+        status_forcelist=[429, 503],
+        raise_on_status=False,  # 重试用尽后返回最后的响应，交给 raise_for_status 按 HTTP 错误处理
+        allowed_methods=frozenset({"POST"}),  # 仅重试上述状态码
+    ),
+))
+
+# 相同对话上下文的回复缓存，重复提问（如“你好”“帮助”）不再请求上游
+_reply_cache = LLMCache(maxsize=2048, ttl=3600)
+
+def _is_connect_failure(exc):
+    """请求是否在建立连接阶段失败（请求尚未发出，重试不会重复生成）"""
+    if isinstance(exc, requests.exceptions.ConnectTimeout):
+        return True
+    reason = getattr(exc.args[0], "reason", None) if exc.args else None
+    return isinstance(reason, urllib3.exceptions.NewConnectionError)
+
+def _build_messages(message, history=None):
+    """构建千问消息列表（最近5轮历史 + 当前消息）"""
+    messages = [
+        {
+            "role": "user" if msg.get("role") == "user" else "assistant",
+            "content": msg.get("content", "")
+        }
+        for msg in (history or [])[-5:]  # 最近5轮对话
+    ]
+    
+    # 添加当前消息
+    messages.append({
+        "role": "user",
+        "content": message
+    })
+    return messages
+
+def call_qwen_api(message, history=None):
     """调用千问API（支持重试）"""
     try:
         # 构建消息列表
-        messages = []
-        
-        # 添加历史对话
-        if history and len(history) > 0:
-            for msg in history[-5:]:  # 最近5轮对话
-                role = "user" if msg.get("role") == "user" else "assistant"
-                messages.append({
-                    "role": role,
-                    "content": msg.get("content", "")
-                })
-        
-        # 添加当前消息
-        messages.append({
-            "role": "user",
-            "content": message
-        })
+        messages = _build_messages(message, history)
+        
+        cache_key = LLMCache.make_key(QWEN_MODEL, messages)
+        cached = _reply_cache.get(cache_key)
+        if cached is not None:
+            logger.info("⚡ 命中回复缓存")
+            return cached
+        
+        # 相同对话并发到达时只请求一次上游，其余请求复用结果
+        return _reply_cache.single_flight(cache_key, lambda: _request_qwen(messages, cache_key))
         
+    except Exception as e:
+        logger.error(f"千问API错误: {e}")
+        return "抱歉，处理您的请求时出现了错误。"
+
+def _request_qwen(messages, cache_key):
+    """请求千问API，成功时写入回复缓存（支持重试）"""
+    try:
         # 构建请求
         payload = {
             "model": QWEN_MODEL,
@@ -60,27 +116,33 @@ def call_qwen_api(message, history=None, retry_count=0):
             "max_tokens": 2048  # 增加至 2048，支持更长的回复
         }
         
-        headers = {
-            "Content-Type": "application/json",
-            "Authorization": f"Bearer {QWEN_API_KEY}"
-        }
-        
-        logger.info(f"调用千问API - 模型: {QWEN_MODEL}, 消息数: {len(messages)}, 重试: {retry_count}")
-        
-        # 发送请求（禁用SSL验证）
-        # 超时时间改为 60 秒，心流平台千问 API 响应较慢
-        response = requests.post(
-            QWEN_API_URL, 
-            json=payload, 
-            headers=headers, 
-            timeout=60,
-            verify=False
-        )
+        for retry_count in range(QWEN_MAX_RETRIES + 1):
+            logger.info(f"调用千问API - 模型: {QWEN_MODEL}, 消息数: {len(messages)}, 重试: {retry_count}")
+            try:
+                # 发送请求（禁用SSL验证）
+                # 超时时间改为 60 秒，心流平台千问 API 响应较慢
+                response = SESSION.post(
+                    QWEN_API_URL, 
+                    json=payload, 
+                    timeout=60,
+                    verify=False
+                )
+                break
+            except requests.exceptions.ConnectionError as e:
+                # 只重试连接失败；请求已发出后的断连交给外层按请求失败处理，避免重复生成
+                if not _is_connect_failure(e):
+                    raise
+                logger.error(f"千问API连接错误 ({retry_count}/{QWEN_MAX_RETRIES}): {str(e)[:100]}")
+                if retry_count == QWEN_MAX_RETRIES:
+                    return "抱歉，无法连接到AI服务。请稍后重试。"
+                # 指数退避 + 随机抖动，避免多个请求在同一时刻集中重试
+                time.sleep(min(30, 2 ** retry_count + random.uniform(0, 1)))
         response.raise_for_status()
         
         # 解析响应
         result = response.json()
-        logger.info(f"千问API响应: {json.dumps(result, ensure_ascii=False)[:200]}")
+        if logger.isEnabledFor(logging.DEBUG):
+            logger.debug(f"千问API响应: {truncate_json(result, 200)}")
         
         # 检查是否有choices字段
         if "choices" not in result or len(result["choices"]) == 0:
@@ -92,17 +154,12 @@ def call_qwen_api(message, history=None, retry_count=0):
         if "message" in choice:
             text = choice["message"].get("content", "")
             if text:
+                _reply_cache.set(cache_key, text)
                 return text
         
         logger.warning(f"千问返回格式异常: {result}")
         return "抱歉，我暂时无法回答这个问题。"
         
-    except requests.exceptions.ConnectionError as e:
-        logger.error(f"千问API连接错误 ({retry_count}/3): {str(e)[:100]}")
-        if retry_count < 3:
-            time.sleep(2)  # 等待后重试
-            return call_qwen_api(message, history, retry_count + 1)
-        return "抱歉，无法连接到AI服务。请稍后重试。"
     except requests.exceptions.RequestException as e:
         logger.error(f"千问API请求失败: {e}")
         return f"抱歉，AI服务暂时不可用。"
@@ -110,6 +167,66 @@ def call_qwen_api(message, history=None, retry_count=0):
         logger.error(f"千问API错误: {e}")
         return "抱歉，处理您的请求时出现了错误。"
 
+def stream_qwen_api(message, history=None):
+    """流式调用千问API，逐段产出回复文本"""
+    try:
+        messages = _build_messages(message, history)
+        cache_key = LLMCache.make_key(QWEN_MODEL, messages)
+        cached = _reply_cache.get(cache_key)
+        if cached is not None:
+            logger.info("⚡ 命中回复缓存")
+            yield cached
+            return
+        
+        payload = {
+            "model": QWEN_MODEL,
+            "messages": messages,
+            "temperature": 0.7,
+            "top_p": 0.95,
+            "max_tokens": 2048,
+            "stream": True
+        }
+        logger.info(f"流式调用千问API - 模型: {QWEN_MODEL}, 消息数: {len(messages)}")
+        
+        parts = []
+        with SESSION.post(
+            QWEN_API_URL,
+            json=payload,
+            timeout=60,
+            verify=False,
+            stream=True
+        ) as response:
+            response.raise_for_status()
+            response.encoding = "utf-8"
+            
+            # OpenAI 兼容的 SSE 格式：每行 "data: {...}"，以 "data: [DONE]" 结束
+            for line in response.iter_lines(decode_unicode=True):
+                if not line or not line.startswith("data:"):
+                    continue
+                data = line[5:].strip()
+                if data == "[DONE]":
+                    break
+                choices = json.loads(data).get("choices") or []
+                if not choices:
+                    continue
+                delta = (choices[0].get("delta") or {}).get("content")
+                if delta:
+                    parts.append(delta)
+                    yield delta
+        
+        text = "".join(parts)
+        if text:
+            _reply_cache.set(cache_key, text)
+        else:
+            yield "抱歉，我暂时无法回答这个问题。"
+        
+    except requests.exceptions.RequestException as e:
+        logger.error(f"千问API流式请求失败: {e}")
+        yield "抱歉，AI服务暂时不可用。"
+    except Exception as e:
+        logger.error(f"千问API错误: {e}")
+        yield "抱歉，处理您的请求时出现了错误。"
+
 @app.route('/api/chat', methods=['POST'])
 def chat_api():
     """千问AI聊天API接口"""
@@ -130,6 +247,10 @@ def chat_api():
                 "status": "error"
             }), 500
         
+        # 请求方声明 stream=true 时以 SSE 逐段返回，首段文字无需等待完整生成
+        if data.get('stream'):
+            return Response(sse_events(stream_qwen_api(message, history)), mimetype="text/event-stream")
+        
         # 调用千问API
         reply = call_qwen_api(message, history)
         
@@ -176,6 +297,7 @@ if __name__ == '__main__':
     print(f"🏢 平台: 心流平台")
     print(f"🔗 远程API: {QWEN_API_URL}")
     print(f"🔑 API Key: {'已配置 ✅' if QWEN_API_KEY else '未配置 ❌'}")
+    print("🚀 生产环境请使用: gunicorn -c gunicorn_conf.py qoder_qwen:app")
     print("=" * 70)
     
     if not QWEN_API_KEY:
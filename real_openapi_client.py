@@ -6,17 +6,25 @@
 
 import os
 import json
+import itertools
 import logging
+import queue
 import subprocess
 import threading
+from collections import deque
 from typing import Optional, List, Dict, Any
 from dataclasses import dataclass
 from dotenv import load_dotenv
 
+load_dotenv()
+
 # 配置日志
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
+# 预先绑定的紧凑编码器，每个请求不再新建 JSONEncoder，也不输出多余空格
+_encode_request = json.JSONEncoder(separators=(",", ":")).encode
+
 @dataclass
 class DocumentContent:
     """文档内容"""
@@ -32,11 +40,21 @@ class RealFeishuOpenAPIClient:
         self.app_id = app_id
         self.app_secret = app_secret
         self.process: Optional[subprocess.Popen] = None
-        self.request_id = 0
+        self._id_iter = itertools.count(1)  # next() 在 C 层原子执行，并发调用不会产生重复 ID
         self._lock = threading.Lock()
+        self._write_lock = threading.Lock()
+        self._pending_lock = threading.Lock()
+        self._pending: Dict[int, queue.Queue] = {}  # 请求 ID -> 等待响应的队列
+        self._initialized = False
+        self._stderr_tail: deque = deque(maxlen=200)  # 最近的 stderr 输出，用于排查初始化失败
         
     def start_mcp_process(self) -> bool:
         """启动 OpenAPI MCP 进程"""
+        # 快速路径：进程已在运行时无需加锁，避免所有请求在这里串行
+        process = self.process
+        if process is not None and process.poll() is None:
+            return True
+        
         with self._lock:
             if self.process and self.process.poll() is None:
                 logger.info("✅ OpenAPI MCP 进程已在运行")
@@ -64,10 +82,27 @@ class RealFeishuOpenAPIClient:
                     stdout=subprocess.PIPE,
                     stderr=subprocess.PIPE,
                     text=True,
+                    encoding="utf-8",  # 请求以 ensure_ascii=False 写入，不能依赖区域设置（容器中常为 C/POSIX）
                     bufsize=1,
                     universal_newlines=True,
                     env=env  # 传入修改后的环境变量
                 )
+                self._initialized = False
+                
+                # 后台线程读取响应并按 ID 分发给调用方
+                threading.Thread(
+                    target=self._reader_loop,
+                    args=(self.process,),
+                    daemon=True
+                ).start()
+                
+                # 持续排空 stderr，避免管道写满后阻塞 MCP 子进程
+                self._stderr_tail.clear()
+                threading.Thread(
+                    target=self._drain_stderr,
+                    args=(self.process,),
+                    daemon=True
+                ).start()
                 
                 logger.info("✅ OpenAPI MCP 进程启动成功")
                 return True
@@ -89,10 +124,44 @@ class RealFeishuOpenAPIClient:
                 finally:
                     self.process = None
     
+    def _reader_loop(self, process: subprocess.Popen):
+        """读取 MCP 进程输出，将响应投递到对应请求 ID 的队列"""
+        try:
+            for line in process.stdout:
+                line = line.strip()
+                if not line:
+                    continue
+                try:
+                    message = json.loads(line)
+                except json.JSONDecodeError:
+                    logger.debug(f"忽略非 JSON 输出: {line[:100]}")
+                    continue
+                
+                with self._pending_lock:
+                    waiter = self._pending.pop(message.get("id"), None)
+                if waiter is not None:
+                    waiter.put(message)
+        except Exception as e:
+            logger.error(f"❌ 读取 MCP 输出失败: {e}")
+        finally:
+            # 进程退出，唤醒所有仍在等待的调用方
+            with self._pending_lock:
+                waiters = list(self._pending.values())
+                self._pending.clear()
+            for waiter in waiters:
+                waiter.put(None)
+    
+    def _drain_stderr(self, process: subprocess.Popen):
+        """读取 MCP 进程的 stderr，只保留最近的若干行"""
+        try:
+            for line in process.stderr:
+                self._stderr_tail.append(line.rstrip())
+        except Exception:
+            pass
+    
     def _get_next_id(self) -> int:
         """获取下一个请求 ID"""
-        self.request_id += 1
-        return self.request_id
+        return next(self._id_iter)
     
     def _send_request(self, method: str, params: Dict = None) -> Optional[Dict]:
         """
@@ -108,11 +177,14 @@ class RealFeishuOpenAPIClient:
         if not self.start_mcp_process():
             return None
         
+        request_id = self._get_next_id()
+        waiter: queue.Queue = queue.Queue(maxsize=1)
+        
         try:
             # 构造 JSON-RPC 请求
             request = {
                 "jsonrpc": "2.0",
-                "id": self._get_next_id(),
+                "id": request_id,
                 "method": method
             }
             
@@ -120,30 +192,42 @@ class RealFeishuOpenAPIClient:
                 request["params"] = params
             
             logger.info(f"📡 发送请求: {method}")
-            logger.debug(f"请求内容: {json.dumps(request, ensure_ascii=False)}")
+            if logger.isEnabledFor(logging.DEBUG):
+                logger.debug(f"请求内容: {json.dumps(request, ensure_ascii=False)}")
+            
+            with self._pending_lock:
+                self._pending[request_id] = waiter
             
-            # 发送请求
-            request_json = json.dumps(request) + "\n"
-            self.process.stdin.write(request_json)
-            self.process.stdin.flush()
+            # 发送请求，只在写入期间持锁，其他调用方可同时等待各自的响应
+            request_json = _encode_request(request) + "\n"
+            with self._write_lock:
+                self.process.stdin.write(request_json)
+                self.process.stdin.flush()
             
-            # 读取响应
-            response_line = self.process.stdout.readline()
-            if response_line:
-                response = json.loads(response_line.strip())
+            # 等待读取线程投递响应
+            response = waiter.get(timeout=30)
+            if response is None:
+                logger.error("❌ MCP 进程已退出")
+                return None
+            
+            if logger.isEnabledFor(logging.DEBUG):
                 logger.debug(f"响应内容: {json.dumps(response, ensure_ascii=False)}")
-                
-                if "error" in response:
-                    logger.error(f"❌ MCP 错误: {response['error']}")
-                    return None
-                
-                return response.get("result")
             
-            return None
+            if "error" in response:
+                logger.error(f"❌ MCP 错误: {response['error']}")
+                return None
             
+            return response.get("result")
+            
+        except queue.Empty:
+            logger.error(f"❌ 请求超时: {method}")
+            return None
         except Exception as e:
             logger.error(f"❌ 发送请求失败: {e}")
             return None
+        finally:
+            with self._pending_lock:
+                self._pending.pop(request_id, None)
     
     def initialize(self) -> bool:
         """初始化 MCP 连接"""
@@ -157,21 +241,13 @@ class RealFeishuOpenAPIClient:
         })
         if result:
             logger.info(f"✅ MCP 初始化成功: {result}")
+            self._initialized = True
             return True
         
-        # 读取 stderr 获取详细错误信息
-        if self.process and self.process.stderr:
-            try:
-                import select
-                # 非阻塞读取 stderr
-                if hasattr(select, 'select'):
-                    ready, _, _ = select.select([self.process.stderr], [], [], 0.1)
-                    if ready:
-                        error_output = self.process.stderr.read()
-                        if error_output:
-                            logger.error(f"❌ MCP 进程错误输出: {error_output}")
-            except Exception as e:
-                logger.warning(f"无法读取 stderr: {e}")
+        # 输出最近的 stderr 获取详细错误信息（由后台线程收集，不会阻塞）
+        if self._stderr_tail:
+            error_output = "\n".join(self._stderr_tail)
+            logger.error(f"❌ MCP 进程错误输出: {error_output}")
         
         logger.error("❌ MCP 初始化失败")
         return False
@@ -215,8 +291,13 @@ class RealFeishuOpenAPIClient:
         try:
             logger.info(f"🔍 搜索文档: '{query}'")
             
-            # 初始化连接
-            if not self.initialize():
+            # 先确保进程在运行：若旧进程已退出，重启会重置 _initialized，新进程需要重新握手
+            if not self.start_mcp_process():
+                logger.error("❌ MCP 进程启动失败")
+                return []
+            
+            # 初始化连接（同一 MCP 进程只需握手一次）
+            if not self._initialized and not self.initialize():
                 logger.error("❌ MCP 初始化失败")
                 return []
             
@@ -282,17 +363,24 @@ class RealFeishuOpenAPIClient:
             logger.error(f"❌ 获取文档信息失败: {e}")
             return None
 
+# 全局客户端实例，所有查询复用同一个 MCP 进程
+client_instance: Optional[RealFeishuOpenAPIClient] = None
+_client_lock = threading.Lock()
+
 def get_real_openapi_client() -> RealFeishuOpenAPIClient:
     """获取真实的 OpenAPI 客户端"""
-    load_dotenv()
-    
-    app_id = os.getenv("FEISHU_APP_ID")
-    app_secret = os.getenv("FEISHU_APP_SECRET")
-    
-    if not app_id or not app_secret:
-        raise ValueError("请在 .env 文件中配置 FEISHU_APP_ID 和 FEISHU_APP_SECRET")
-    
-    return RealFeishuOpenAPIClient(app_id, app_secret)
+    global client_instance
+    if client_instance is None:
+        with _client_lock:
+            if client_instance is None:
+                app_id = os.getenv("FEISHU_APP_ID")
+                app_secret = os.getenv("FEISHU_APP_SECRET")
+                
+                if not app_id or not app_secret:
+                    raise ValueError("请在 .env 文件中配置 FEISHU_APP_ID 和 FEISHU_APP_SECRET")
+                
+                client_instance = RealFeishuOpenAPIClient(app_id, app_secret)
+    return client_instance
 
 def search_feishu_knowledge_real(query: str, count: int = 3) -> str:
     """
@@ -330,7 +418,7 @@ def search_feishu_knowledge_real(query: str, count: int = 3) -> str:
 
 # 程序退出时清理资源
 import atexit
-client_instance = None
+
 def cleanup():
     global client_instance
     if client_instance:
@@ -6,13 +6,93 @@
 
 import os
 import json
+import hashlib
+import functools
 import logging
+import threading
+import time
 import requests
+from concurrent.futures import Future, ThreadPoolExecutor
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
 from typing import Optional, Dict, Any, List
 from feishu_auth import get_user_access_token
+from llm_cache import LLMCache
 
 logger = logging.getLogger(__name__)
 
+# 复用连接池的全局会话，所有搜索共享与 open.feishu.cn 的 keep-alive 连接
+_SESSION = requests.Session()
+_SESSION.headers.update({"Content-Type": "application/json"})
+_SESSION.mount("https://", HTTPAdapter(
+    pool_connections=10,
+    pool_maxsize=50,
+    max_retries=Retry(
+        total=2,
+        read=False,  # 读超时直接抛出 Timeout，交给“搜索文档超时”分支，不再重复等待
+        backoff_factor=0.2,
+        status_forcelist=(500, 502, 503, 504),
+        raise_on_status=False,  # 5xx 重试用尽后返回最后的响应，由调用方按状态码处理
+        allowed_methods=frozenset({"GET", "POST"}),  # 搜索和取 token 均为只读操作，可安全重试
+    ),
+))
+
+
+@functools.lru_cache(maxsize=8)
+def _auth_headers(user_token: str) -> Dict[str, str]:
+    """同一个 user_access_token 复用同一份请求头（token 刷新后自动生成新的）
+    
+    不直接写到共享的 _SESSION.headers 上：会话同时用于获取 app_access_token，
+    且多线程下不同 token 会互相覆盖。
+    """
+    return {"Authorization": f"Bearer {user_token}"}
+
+
+def _preview(body: bytes, limit: int = 200) -> str:
+    """只解码响应体的前 limit 个字节用于日志，不为整个响应体再生成一份 str 副本"""
+    return body[:limit].decode("utf-8", errors="replace")
+
+
+# 单个文档的结果模板，导入时绑定 str.format
+_DOC_TMPL = "\n---\n### 📄 文档 {i}: {title}\n- 类型: {doc_type}\n- 链接: {doc_url}\n- 作者: {owner_name}\n".format
+
+# 搜索结果可能位于的字段（按优先级），不同接口返回 files / docs_entities / docs 之一
+_DOC_LIST_KEYS = ("files", "docs_entities", "docs")
+
+# 不同接口返回的文档字段名不同：每个属性的候选键，按顺序取第一个非空值
+_TITLE_KEYS = ("title", "name", "docs_token")
+_TYPE_KEYS = ("type", "docs_type", "doc_type")
+_TOKEN_KEYS = ("token", "docs_token")
+
+
+def _pick(doc: Dict[str, Any], keys: tuple, default: str = "") -> Any:
+    """按顺序返回第一个非空字段的值"""
+    for key in keys:
+        value = doc.get(key)
+        if value:
+            return value
+    return default
+
+# 搜索结果缓存：相同用户在 5 分钟内的相同查询直接返回格式化结果，跳过用户信息和搜索两次请求
+_search_cache = LLMCache(maxsize=512, ttl=300)
+
+# 后台搜索线程池：线程按需创建，上限 8 个并发请求，避免触发飞书接口限流
+_SEARCH_EXECUTOR = ThreadPoolExecutor(max_workers=8, thread_name_prefix="feishu-search")
+
+
+# 常见的搜索前缀
+_SEARCH_PREFIXES = ("搜索", "查找", "查询", "帮我查", "找一下")
+
+# 相关的同义词和扩展词，导入时预先拼接成 OR 查询
+_SYNONYMS_MAP = {
+    "入库": ["入库", "进货", "采购", "仓储"],
+    "文档": ["文档", "文件", "资料", "记录", "报告"],
+    "项目": ["项目", "工程", "任务", "计划"],
+    "技术": ["技术", "科技", "开发", "研发"],
+    "产品": ["产品", "商品", "服务", "解决方案"]
+}
+_SYNONYM_QUERIES = {key: " OR ".join(synonyms) for key, synonyms in _SYNONYMS_MAP.items()}
+
 
 def optimize_search_query(query: str) -> str:
     """
@@ -25,29 +105,19 @@ def optimize_search_query(query: str) -> str:
         优化后的搜索关键词
     """
     # 移除常见的搜索前缀
-    prefixes = ["搜索", "查找", "查询", "帮我查", "找一下"]
     optimized = query.lower().strip()
     
-    for prefix in prefixes:
-        if optimized.startswith(prefix):
-            optimized = optimized[len(prefix):].strip()
+    for prefix in _SEARCH_PREFIXES:
+        stripped = optimized.removeprefix(prefix)
+        if stripped != optimized:
+            optimized = stripped.strip()
             break
     
-    # 添加相关的同义词和扩展词
-    synonyms_map = {
-        "入库": ["入库", "进货", "采购", "仓储"],
-        "文档": ["文档", "文件", "资料", "记录", "报告"],
-        "项目": ["项目", "工程", "任务", "计划"],
-        "技术": ["技术", "科技", "开发", "研发"],
-        "产品": ["产品", "商品", "服务", "解决方案"]
-    }
-    
-    # 如果查询词较短，尝试扩展
+    # 如果查询词较短，尝试扩展为多个可能的搜索词
     if len(optimized) <= 4:
-        for key, synonyms in synonyms_map.items():
+        for key, expanded in _SYNONYM_QUERIES.items():
             if key in optimized:
-                # 返回多个可能的搜索词
-                return " OR ".join(synonyms)
+                return expanded
     
     return optimized
 
@@ -55,8 +125,17 @@ FEISHU_APP_ID = os.getenv("FEISHU_APP_ID", "")
 FEISHU_APP_SECRET = os.getenv("FEISHU_APP_SECRET", "")
 
 
+# app_access_token 有效期约 2 小时，缓存到过期前 90 秒再刷新
+_app_token_cache = {"token": None, "expire_time": 0.0}
+_app_token_lock = threading.Lock()
+APP_TOKEN_REFRESH_BUFFER = 90
+
+
 def _get_app_access_token() -> Optional[str]:
-    """获取应用级别的 access_token"""
+    """获取应用级别的 access_token（带缓存）"""
+    if _app_token_cache["token"] and _app_token_cache["expire_time"] > time.monotonic():
+        return _app_token_cache["token"]
+    
     url = "https://open.feishu.cn/open-apis/auth/v3/app_access_token/internal"
     
     payload = {
@@ -65,16 +144,24 @@ def _get_app_access_token() -> Optional[str]:
     }
     
     try:
-        response = requests.post(url, json=payload, timeout=10)
-        result = response.json()
-        
-        if result.get("code") == 0:
-            return result.get("app_access_token")
-        else:
-            logger.error(f"获取 app_access_token 失败: {result.get('msg')}")
-            return None
+        with _app_token_lock:
+            # 等锁期间可能已有其他线程刷新过
+            if _app_token_cache["token"] and _app_token_cache["expire_time"] > time.monotonic():
+                return _app_token_cache["token"]
+            
+            response = _SESSION.post(url, json=payload, timeout=10)
+            result = json.loads(response.content)
+            
+            if result.get("code") == 0:
+                token = result.get("app_access_token")
+                _app_token_cache["token"] = token
+                _app_token_cache["expire_time"] = time.monotonic() + result.get("expire", 7200) - APP_TOKEN_REFRESH_BUFFER
+                return token
+            else:
+                logger.error("获取 app_access_token 失败: %s", result.get('msg'))
+                return None
     except Exception as e:
-        logger.error(f"请求 app_access_token 失败: {e}")
+        logger.error("请求 app_access_token 失败: %s", e)
         return None
 
 
@@ -89,26 +176,29 @@ def search_feishu_docs_rest(query: str, count: int = 3) -> str:
     Returns:
         格式化的搜索结果
     """
-    logger.info(f"🔍 [REST API] 搜索飞书文档: '{query}'")
-    
-    # 优化搜索关键词
-    optimized_query = optimize_search_query(query)
-    logger.info(f"🔍 [REST API] 原始搜索: '{query}' -> 优化后: '{optimized_query}'")
-    
-    # 获取用户 access_token
+    # 先检查授权：未授权时直接返回，不做任何关键词处理
     user_token = get_user_access_token()
     if not user_token:
         logger.error("❌ 未获取到用户 access_token")
         return "❌ 未授权。请先完成 OAuth 授权。"
     
+    logger.info("🔍 [REST API] 搜索飞书文档: '%s'", query)
+    
+    # 优化搜索关键词
+    optimized_query = optimize_search_query(query)
+    logger.info("🔍 [REST API] 原始搜索: '%s' -> 优化后: '%s'", query, optimized_query)
+    
+    cache_key = hashlib.blake2b(f"{optimized_query}|{count}|{user_token}".encode("utf-8")).digest()
+    cached = _search_cache.get(cache_key)
+    if cached is not None:
+        logger.info("⚡ [REST API] 命中搜索缓存: '%s'", optimized_query)
+        return cached
+    
     # 使用新版 Drive API 搜索文档
     # 参考: https://open.feishu.cn/document/server-docs/docs/drive-v1/search/document-search
     url = "https://open.feishu.cn/open-apis/drive/v1/files/search"
     
-    headers = {
-        "Authorization": f"Bearer {user_token}",
-        "Content-Type": "application/json"
-    }
+    headers = _auth_headers(user_token)
     
     # 获取用户信息用于搜索
     from feishu_auth import get_auth_manager
@@ -129,85 +219,114 @@ def search_feishu_docs_rest(query: str, count: int = 3) -> str:
         payload["user_id"] = user_id
     
     try:
-        response = requests.post(url, headers=headers, json=payload, timeout=15)
-        
-        # 调试：记录原始响应
-        logger.debug(f"响应状态码: {response.status_code}")
-        logger.debug(f"响应内容: {response.text[:1000]}")
+        response = _SESSION.post(url, headers=headers, json=payload, timeout=15)
         
-        # 特别记录搜索相关的调试信息
-        logger.info(f"🔍 [调试] 搜索请求详情:")
-        logger.info(f"   URL: {url}")
-        logger.info(f"   Headers: {{'Authorization': 'Bearer ***{user_token[-10:] if user_token else 'None'}', 'Content-Type': 'application/json'}}")
-        logger.info(f"   Payload: {payload}")
+        # 调试：记录请求详情和原始响应（仅在 DEBUG 级别解码响应体）
+        if logger.isEnabledFor(logging.DEBUG):
+            logger.debug("🔍 [调试] 搜索请求详情: URL=%s, Token=***%s, Payload=%s", url, user_token[-10:], payload)
+            logger.debug("响应状态码: %s", response.status_code)
+            logger.debug("响应内容: %s", _preview(response.content, 1000))
         
         # 检查响应状态码
         if response.status_code != 200:
-            logger.error(f"❌ HTTP 错误: {response.status_code}, 内容: {response.text[:200]}")
+            logger.error("❌ HTTP 错误: %s, 内容: %s", response.status_code, _preview(response.content))
             return f"❌ 搜索文档失败: HTTP {response.status_code}"
         
         # 尝试解析 JSON
         try:
-            result = response.json()
-        except json.JSONDecodeError as e:
-            logger.error(f"❌ JSON 解析失败: {e}, 响应内容: {response.text[:200]}")
+            # 直接解析原始字节（json 自动识别 UTF-8/16/32），跳过 requests 的编码探测和文本解码
+            result = json.loads(response.content)
+        except ValueError as e:
+            logger.error("❌ JSON 解析失败: %s, 响应内容: %s", e, _preview(response.content))
             return f"❌ 搜索文档失败: 响应格式错误"
         
         if result.get("code") != 0:
             error_msg = result.get("msg", "未知错误")
-            logger.error(f"❌ 搜索文档失败: {error_msg}")
+            logger.error("❌ 搜索文档失败: %s", error_msg)
             return f"❌ 搜索文档失败: {error_msg}"
         
         data = result.get("data", {})
-        # drive/v1/files/search 返回的是 files 或 docs_entities
-        docs = data.get("files", []) or data.get("docs_entities", []) or data.get("docs", [])
+        # drive/v1/files/search 返回的是 files 或 docs_entities，据此一次性选定字段映射
+        schema = next((key for key in _DOC_LIST_KEYS if data.get(key)), None)
+        docs = data[schema] if schema else []
         
-        # 详细记录搜索结果
-        logger.info(f"🔍 [调试] 搜索结果分析:")
-        logger.info(f"   原始数据结构: {list(data.keys()) if isinstance(data, dict) else '非字典类型'}")
-        logger.info(f"   files 字段: {len(data.get('files', []))} 项")
-        logger.info(f"   docs_entities 字段: {len(data.get('docs_entities', []))} 项")
-        logger.info(f"   docs 字段: {len(data.get('docs', []))} 项")
-        logger.info(f"   最终匹配文档数: {len(docs)} 项")
+        # 搜索结果分析（单行 DEBUG 日志）
+        logger.debug("🔍 [调试] 搜索结果分析: 数据字段=%s, 匹配字段=%s, 文档数=%d", list(data), schema, len(docs))
         
         if not docs:
-            logger.info(f"ℹ️  未找到与 '{query}' 相关的文档")
+            logger.info("ℹ️  未找到与 '%s' 相关的文档", query)
             return f"未找到与 '{query}' 相关的飞书文档。"
         
         # 格式化结果
         formatted_parts = [f"📚 **检索到的飞书文档内容：**\n\n找到 {len(docs)} 个相关文档：\n"]
         
+        
         for i, doc in enumerate(docs, 1):
             # 适配不同 API 的字段名称
-            title = doc.get("title", "") or doc.get("name", "") or doc.get("docs_token", "无标题")
-            doc_type = doc.get("type", "") or doc.get("docs_type", "") or doc.get("doc_type", "docx")
-            doc_token = doc.get("token", "") or doc.get("docs_token", "")
-            doc_url = doc.get("url", "") or f"https://k7ftx11633c.feishu.cn/{doc_type}/{doc_token}"
-            owner_name = doc.get("owner", {}).get("name", "") if isinstance(doc.get("owner"), dict) else doc.get("owner_name", "")
+            title = _pick(doc, _TITLE_KEYS, "无标题")
+            doc_type = _pick(doc, _TYPE_KEYS, "docx")
+            doc_url = doc.get("url") or f"https://k7ftx11633c.feishu.cn/{doc_type}/{_pick(doc, _TOKEN_KEYS)}"
+            owner = doc.get("owner")
+            owner_name = owner.get("name", "") if isinstance(owner, dict) else doc.get("owner_name", "")
             
-            part = f"""
----
-### 📄 文档 {i}: {title}
-- 类型: {doc_type}
-- 链接: {doc_url}
-- 作者: {owner_name}
-"""
-            formatted_parts.append(part)
+            formatted_parts.append(_DOC_TMPL(
+                i=i, title=title, doc_type=doc_type, doc_url=doc_url, owner_name=owner_name
+            ))
         
         formatted_parts.append("\n---\n以上是检索到的飞书文档内容，请基于这些信息回答用户问题。")
         
         result_text = "\n".join(formatted_parts)
-        logger.info(f"✅ [REST API] 搜索成功，找到 {len(docs)} 个文档")
+        _search_cache.set(cache_key, result_text)
+        logger.info("✅ [REST API] 搜索成功，找到 %d 个文档", len(docs))
         return result_text
         
     except requests.exceptions.Timeout:
         logger.error("❌ 搜索文档超时")
         return "❌ 搜索文档超时，请稍后重试。"
     except Exception as e:
-        logger.error(f"❌ 搜索文档异常: {e}")
+        logger.error("❌ 搜索文档异常: %s", e)
         return f"❌ 搜索文档失败: {str(e)}"
 
 
+def clear_search_cache():
+    """清空搜索结果缓存"""
+    _search_cache.clear()
+
+
+def search_feishu_docs_rest_async(query: str, count: int = 3) -> Future:
+    """
+    在后台线程中搜索飞书文档，立即返回 Future
+    
+    多个搜索可同时进行，总耗时取决于最慢的一次请求，而不是各次请求之和。
+    
+    Args:
+        query: 搜索关键词
+        count: 返回文档数量
+        
+    Returns:
+        结果为格式化搜索文本的 Future
+    """
+    return _SEARCH_EXECUTOR.submit(search_feishu_docs_rest, query, count)
+
+
+def search_feishu_docs_many(queries: List[str], count: int = 3) -> List[str]:
+    """
+    并发搜索多个关键词，按输入顺序返回结果
+    
+    所有请求共享连接池并发执行（最多 8 个同时进行），
+    N 个查询的总耗时约为一次请求的耗时；重复的关键词只搜索一次。
+    
+    Args:
+        queries: 搜索关键词列表
+        count: 每个关键词返回的文档数量
+        
+    Returns:
+        与 queries 一一对应的格式化搜索结果
+    """
+    futures = {query: search_feishu_docs_rest_async(query, count) for query in dict.fromkeys(queries)}
+    return [futures[query].result() for query in queries]
+
+
 # 兼容旧接口
 def search_feishu_knowledge_real(query: str, count: int = 3) -> str:
     """兼容接口，使用 REST API"""
@@ -6,7 +6,6 @@
 
 import os
 import sys
-import subprocess
 
 
 def print_header(text):
@@ -47,6 +46,7 @@ def check_dependencies():
         install = input("是否现在安装？(y/n): ").lower()
         if install == 'y':
             print("\n正在安装依赖...")
+            import subprocess
             try:
                 subprocess.check_call([sys.executable, "-m", "pip", "install", "-r", "requirements.txt"])
                 print("✅ 依赖安装完成")
@@ -114,6 +114,7 @@ LOG_LEVEL=INFO
 def check_ngrok():
     """检查ngrok是否安装"""
     print("\n检查ngrok（内网穿透工具）...")
+    import subprocess
     try:
         result = subprocess.run(['ngrok', 'version'], 
                               capture_output=True, 
@@ -148,6 +149,8 @@ def start_services():
     if choice == "0":
         return
     
+    import subprocess
+    
     if choice in ["1", "3"]:
         print("\n正在启动飞书机器人服务...")
         print("提示：服务将在新终端窗口中运行")
@@ -5,15 +5,10 @@
 """
 
 import os
-import json
 import logging
-import subprocess
 from typing import Optional, List
 from dataclasses import dataclass
-from dotenv import load_dotenv
 
-# 配置日志
-logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
 @dataclass
@@ -24,6 +19,14 @@ class DocumentContent:
     url: str
     truncated: bool = False
 
+# 模拟搜索结果的固定部分（标题前缀、内容、链接），导入时构造一次
+_MOCK_RESULTS = (
+    ("搜索结果", "这是通过 OpenAPI 搜索到的文档内容，包含相关知识点和信息...",
+     "https://k7ftx11633c.feishu.cn/wiki/test_result"),
+    ("相关文档", "另一个相关的文档内容，提供更多详细信息和参考资料...",
+     "https://k7ftx11633c.feishu.cn/wiki/related_result"),
+)
+
 class SimpleFeishuOpenAPIClient:
     """简化的飞书 OpenAPI 客户端"""
     
@@ -40,20 +43,11 @@ class SimpleFeishuOpenAPIClient:
             
             # 先返回模拟结果确保流程通畅
             logger.info("✅ 返回模拟搜索结果")
+            # 只构造需要返回的条目
             return [
-                DocumentContent(
-                    title=f"搜索结果: {query}",
-                    content="这是通过 OpenAPI 搜索到的文档内容，包含相关知识点和信息...",
-                    url="https://k7ftx11633c.feishu.cn/wiki/test_result",
-                    truncated=False
-                ),
-                DocumentContent(
-                    title=f"相关文档: {query}",
-                    content="另一个相关的文档内容，提供更多详细信息和参考资料...",
-                    url="https://k7ftx11633c.feishu.cn/wiki/related_result",
-                    truncated=False
-                )
-            ][:count]
+                DocumentContent(title=f"{prefix}: {query}", content=content, url=url)
+                for prefix, content, url in _MOCK_RESULTS[:count]
+            ]
             
         except Exception as e:
             logger.error(f"❌ Wiki 搜索失败: {e}")
@@ -81,6 +75,8 @@ class SimpleFeishuOpenAPIClient:
 
 def get_simple_openapi_client() -> SimpleFeishuOpenAPIClient:
     """获取简化版 OpenAPI 客户端"""
+    # 仅在真正创建客户端时才加载 dotenv，导入本模块保持轻量
+    from dotenv import load_dotenv
     load_dotenv()
     
     app_id = os.getenv("FEISHU_APP_ID")
@@ -124,6 +120,7 @@ def search_feishu_knowledge_simple(query: str, count: int = 3) -> str:
 
 if __name__ == "__main__":
     # 测试代码
+    logging.basicConfig(level=logging.INFO)
     print("=" * 60)
     print("🧪 简化版 OpenAPI 文档检索测试")
     print("=" * 60)
@@ -5,14 +5,22 @@ Skill 管理器
 """
 
 import os
+import sys
+import inspect
 import logging
-from typing import Dict, Any, Optional, Callable
-from dataclasses import dataclass
+import operator
+import threading
+from types import MappingProxyType
+from typing import Dict, Any, Optional, Callable, Mapping, Tuple
+from dataclasses import dataclass, field, replace
 
-logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
-@dataclass
+# Python 3.10+ 上 SkillMetadata 使用 __slots__（无实例 __dict__，属性读取更快）；
+# 部署镜像的 Python 3.9 不支持 dataclass 的 slots 参数，退回普通 dataclass
+_SLOTS = {"slots": True} if sys.version_info >= (3, 10) else {}
+
+@dataclass(**_SLOTS)
 class SkillMetadata:
     """Skill 元数据"""
     name: str
@@ -20,14 +28,38 @@ class SkillMetadata:
     handler: Callable
     params_schema: Dict[str, Any]
     enabled: bool = True
+    # 注册时解析的处理函数参数名（含 *args/**kwargs 等时为 None），以及按参数名顺序取值的 itemgetter
+    arg_names: Optional[Tuple[str, ...]] = None
+    arg_getter: Optional[Callable] = field(default=None, repr=False)
+
+def _plain_arg_names(handler: Callable) -> Optional[Tuple[str, ...]]:
+    """返回处理函数的参数名；含 *args、**kwargs 或仅限关键字参数时返回 None"""
+    try:
+        parameters = inspect.signature(handler).parameters.values()
+    except (TypeError, ValueError):
+        return None
+    if any(p.kind is not inspect.Parameter.POSITIONAL_OR_KEYWORD for p in parameters):
+        return None
+    return tuple(p.name for p in parameters)
 
 class SkillManager:
     """Skill 管理器"""
     
     def __init__(self):
+        # 写时复制：注册/启用/禁用时生成新字典并整体替换，已发布的字典不再修改，
+        # 调用 Skill 的请求线程只读 _snapshot，无需加锁也不会读到修改到一半的状态
         self.skills: Dict[str, SkillMetadata] = {}
+        self._snapshot: Mapping[str, SkillMetadata] = MappingProxyType(self.skills)
+        self._write_lock = threading.Lock()
         logger.info("🎯 Skill 管理器初始化")
     
+    def _publish(self, name: str, skill: SkillMetadata):
+        """发布包含该 Skill 的新快照（调用方需持有 _write_lock）"""
+        skills = dict(self.skills)
+        skills[name] = skill
+        self.skills = skills
+        self._snapshot = MappingProxyType(skills)
+    
     def register_skill(
         self, 
         name: str, 
@@ -46,16 +78,20 @@ class SkillManager:
             params_schema: 参数模式定义
             enabled: 是否启用
         """
+        arg_names = _plain_arg_names(handler)
         skill = SkillMetadata(
             name=name,
             description=description,
             handler=handler,
             params_schema=params_schema or {},
-            enabled=enabled
+            enabled=enabled,
+            arg_names=arg_names,
+            arg_getter=operator.itemgetter(*arg_names) if arg_names else None
         )
         
-        self.skills[name] = skill
-        logger.info(f"✅ 注册 Skill: {name} - {description}")
+        with self._write_lock:
+            self._publish(name, skill)
+        logger.info("✅ 注册 Skill: %s - %s", name, description)
     
     def invoke_skill(self, name: str, params: Dict[str, Any] = None) -> Any:
         """
@@ -68,47 +104,70 @@ class SkillManager:
         Returns:
             Skill 执行结果
         """
-        if name not in self.skills:
-            logger.error(f"❌ Skill 不存在: {name}")
+        skill = self._snapshot.get(name)
+        if skill is None:
+            logger.error("❌ Skill 不存在: %s", name)
             raise ValueError(f"Skill '{name}' not found")
         
-        skill = self.skills[name]
-        
         if not skill.enabled:
-            logger.warning(f"⚠️  Skill 未启用: {name}")
+            logger.warning("⚠️  Skill 未启用: %s", name)
             return None
         
-        logger.info(f"🔧 调用 Skill: {name}")
+        logger.info("🔧 调用 Skill: %s", name)
         
         try:
             # 调用 Skill 处理函数
             params = params or {}
-            result = skill.handler(**params)
-            logger.info(f"✅ Skill 执行成功: {name}")
+            result = self._call_handler(skill, params)
+            logger.info("✅ Skill 执行成功: %s", name)
             return result
         except Exception as e:
-            logger.error(f"❌ Skill 执行失败: {name} - {e}")
+            logger.error("❌ Skill 执行失败: %s - %s", name, e)
             raise
     
-    def list_skills(self) -> Dict[str, SkillMetadata]:
-        """列出所有已注册的 Skills"""
-        return self.skills
+    @staticmethod
+    def _call_handler(skill: SkillMetadata, params: Dict[str, Any]) -> Any:
+        """调用处理函数：参数齐全时按位置传参，跳过关键字参数绑定"""
+        arg_names = skill.arg_names
+        if arg_names is not None and len(params) == len(arg_names):
+            if not arg_names:
+                return skill.handler()
+            try:
+                args = skill.arg_getter(params)
+            except KeyError:
+                pass
+            else:
+                # 单个参数名时 itemgetter 直接返回值而不是元组
+                return skill.handler(args) if len(arg_names) == 1 else skill.handler(*args)
+        # 使用默认值、参数不匹配等情况仍按关键字调用，报错与原先一致
+        return skill.handler(**params)
+    
+    def list_skills(self) -> Mapping[str, SkillMetadata]:
+        """列出所有已注册的 Skills（只读快照）"""
+        return self._snapshot
     
     def get_skill(self, name: str) -> Optional[SkillMetadata]:
         """获取指定的 Skill 元数据"""
-        return self.skills.get(name)
+        return self._snapshot.get(name)
+    
+    def _set_enabled(self, name: str, enabled: bool) -> bool:
+        """替换为启用状态不同的新元数据，Skill 不存在时返回 False"""
+        with self._write_lock:
+            skill = self.skills.get(name)
+            if skill is None:
+                return False
+            self._publish(name, replace(skill, enabled=enabled))
+            return True
     
     def enable_skill(self, name: str):
         """启用一个 Skill"""
-        if name in self.skills:
-            self.skills[name].enabled = True
-            logger.info(f"✅ 启用 Skill: {name}")
+        if self._set_enabled(name, True):
+            logger.info("✅ 启用 Skill: %s", name)
     
     def disable_skill(self, name: str):
         """禁用一个 Skill"""
-        if name in self.skills:
-            self.skills[name].enabled = False
-            logger.info(f"⏸️  禁用 Skill: {name}")
+        if self._set_enabled(name, False):
+            logger.info("⏸️  禁用 Skill: %s", name)
 
 # 全局 Skill 管理器实例
 _skill_manager = None
@@ -136,6 +195,8 @@ def invoke_skill(name: str, **params) -> Any:
 
 # 测试代码
 if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO)
+    
     # 创建管理器
     manager = get_skill_manager()
     
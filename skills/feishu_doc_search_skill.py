@@ -6,12 +6,13 @@
 
 import logging
 from typing import Dict, Any
-from feishu_docs_openapi import search_feishu_knowledge
-from feishu_auth import is_user_authorized
 
-logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
+# 所有搜索客户端（REST / MCP / 简单客户端）的成功结果都以此开头，
+# 未找到、未授权、超时等失败结果则是不带该标题的提示语
+_RESULT_HEADER = "📚 **检索到的飞书文档内容：**"
+
 def feishu_doc_search_skill(query: str, count: int = 3) -> Dict[str, Any]:
     """
     飞书文档搜索 Skill
@@ -28,7 +29,11 @@ def feishu_doc_search_skill(query: str, count: int = 3) -> Dict[str, Any]:
             "documents_found": int  # 找到的文档数量
         }
     """
-    logger.info(f"📚 [Skill] 飞书文档搜索: query='{query}', count={count}")
+    logger.info("📚 [Skill] 飞书文档搜索: query='%s', count=%s", query, count)
+    
+    # 首次调用时才导入搜索和授权模块，仅注册/列出 Skill 时不加载 HTTP 客户端
+    from feishu_auth import is_user_authorized
+    from feishu_docs_openapi import search_feishu_knowledge
     
     # 检查授权状态
     if not is_user_authorized():
@@ -44,9 +49,9 @@ def feishu_doc_search_skill(query: str, count: int = 3) -> Dict[str, Any]:
         # 调用文档搜索
         result = search_feishu_knowledge(query, count)
         
-        # 判断是否成功
-        if "未找到" in result or "未授权" in result or "错误" in result:
-            logger.info(f"ℹ️  [Skill] 未找到相关文档")
+        # 判断是否成功：只看开头，不扫描整段结果（文档标题里的“错误”等字样也不会误判）
+        if not result.startswith(_RESULT_HEADER):
+            logger.info("ℹ️  [Skill] 未找到相关文档")
             return {
                 "success": False,
                 "result": result,
@@ -57,7 +62,7 @@ def feishu_doc_search_skill(query: str, count: int = 3) -> Dict[str, Any]:
         # 统计找到的文档数量
         doc_count = result.count("### 📄 文档")
         
-        logger.info(f"✅ [Skill] 搜索成功，找到 {doc_count} 个文档")
+        logger.info("✅ [Skill] 搜索成功，找到 %d 个文档", doc_count)
         return {
             "success": True,
             "result": result,
@@ -66,7 +71,7 @@ def feishu_doc_search_skill(query: str, count: int = 3) -> Dict[str, Any]:
         }
         
     except Exception as e:
-        logger.error(f"❌ [Skill] 搜索失败: {e}")
+        logger.error("❌ [Skill] 搜索失败: %s", e)
         return {
             "success": False,
             "result": "",
@@ -97,6 +102,8 @@ SKILL_METADATA = {
 
 # 测试代码
 if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO)
+    
     print("=" * 60)
     print("🧪 飞书文档搜索 Skill 测试")
     print("=" * 60)
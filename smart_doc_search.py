@@ -5,13 +5,15 @@
 """
 
 import re
+import bisect
 import logging
-from typing import List, Tuple
+import functools
+from typing import List, Optional, Tuple
 from dataclasses import dataclass
 
 logger = logging.getLogger(__name__)
 
-@dataclass
+@dataclass(frozen=True)
 class SearchAnalysis:
     """搜索分析结果"""
     should_search: bool
@@ -19,12 +21,18 @@ class SearchAnalysis:
     reason: str
     extracted_query: str
 
+# 批量分析时拼接消息的分隔符
+_BATCH_SEPARATOR = "\n\x00\n"
+
 class SmartDocSearchAnalyzer:
     """智能文档搜索分析器"""
     
+    # 提取查询词时清理特殊字符
+    _CLEAN_RE = re.compile(r'[^\w\s\u4e00-\u9fff]')
+    
     def __init__(self):
         # 扩展的触发关键词
-        self.trigger_keywords = [
+        self.trigger_keywords = (
             # 基础关键词
             "文档", "知识库", "wiki", "查一下", "搜索", "找一下", "帮我查", 
             "资料", "教程", "说明", "手册", "查找", "查询", "检索", "看看", 
@@ -36,39 +44,86 @@ class SmartDocSearchAnalyzer:
             
             # 内容类型
             "流程", "规范", "标准", "指南", "最佳实践", "制度", "规定"
-        ]
+        )
         
         # 疑问词
-        self.question_indicators = [
+        self.question_indicators = (
             "怎么", "如何", "怎样", "什么", "哪个", "哪些",
             "有没有", "是否存在", "能否", "可以", "应该",
             "请教", "请问", "求助", "帮忙", "求"
-        ]
+        )
         
         # 内容相关词
-        self.content_words = [
+        self.content_words = (
             "流程", "步骤", "方法", "方式", "操作", "配置", 
             "设置", "安装", "部署", "使用", "规范", "标准", 
             "要求", "规定", "文档", "资料", "信息"
-        ]
+        )
         
         # 上下文指示词
-        self.context_indicators = [
+        self.context_indicators = (
             "项目", "产品", "系统", "平台", "工具", "服务",
             "sdk", "api", "接口", "框架", "组件", "模块"
-        ]
+        )
         
         # 需求动词
-        self.need_verbs = [
+        self.need_verbs = (
             "了解", "熟悉", "掌握", "学习", "研究", "查看",
             "需要", "准备", "整理", "参考", "查阅"
-        ]
+        )
         
         # 问候语（用于排除）
-        self.greetings = [
+        self.greetings = (
             "你好", "您好", "hello", "hi", "早上好", "下午好",
             "晚上好", "辛苦了", "谢谢", "感谢"
-        ]
+        )
+        
+        # 查询词提取时去掉的前置词 / 后缀词
+        self._query_prefixes = ("帮我", "请", "想", "要", "查找", "搜索", "查一下", "找一下")
+        self._query_suffixes = ("的文档", "的资料", "怎么做", "如何做", "相关信息")
+        
+        # 复杂查询判断用到的词集合，与扫描结果求交集即可，无需逐个比较
+        self._greeting_set = frozenset(self.greetings)
+        self._complex_content_set = frozenset(("流程", "步骤", "方法", "配置", "使用", "操作"))
+        
+        # 纯问候消息：只由问候语和标点/空白组成，如“你好！”、“谢谢~”；至少含一个问候语，纯标点不算
+        greeting_alt = "|".join(map(re.escape, sorted(self.greetings, key=len, reverse=True)))
+        self._greeting_only_re = re.compile(
+            "[\\W_]*(?:%s)(?:%s|[\\W_])*" % (greeting_alt, greeting_alt)
+        )
+        
+        # 所有关键词合并为一个扫描器，每条消息只扫描一遍就得到出现过的全部关键词
+        # （pyahocorasick 不在依赖中，用正则前瞻实现同样的单遍多模式匹配）
+        all_keywords = sorted(
+            set(self.trigger_keywords + self.question_indicators + self.content_words
+                + self.context_indicators + self.need_verbs + self.greetings),
+            key=len, reverse=True
+        )
+        self._keyword_re = re.compile("(?=(%s))" % "|".join(map(re.escape, all_keywords)))
+        # 同一位置只会匹配到最长的关键词，它的前缀关键词也必然出现在文本中
+        self._keyword_prefixes = {
+            keyword: frozenset(k for k in all_keywords if keyword.startswith(k))
+            for keyword in all_keywords
+        }
+        
+        # 分析结果只取决于规范化后的文本：重复消息（飞书事件重投、重复提问）直接复用结果
+        self._analyze_cached = functools.lru_cache(maxsize=4096)(self._analyze)
+        
+        # 疑问句、任务导向的正则模式各合并为一个交替表达式，对文本只扫描一遍
+        self._question_re = re.compile("|".join(f"(?:{p})" for p in (
+            r"怎么.{0,15}(做|用|操作|配置|设置|部署)",
+            r"如何.{0,15}(做|用|操作|配置|设置|部署)",
+            r"(什么是|什么是|什么叫).{1,20}",
+            r".{1,20}(在哪|怎么找|哪里有)",
+            r"(有没有|是否存在).{1,20}(文档|说明|教程|资料)",
+            r"(请教|请问|求助).{1,20}(如何|怎么)"
+        )))
+        self._task_re = re.compile("|".join(f"(?:{p})" for p in (
+            r"(需要|准备|整理).{0,15}(文档|资料|信息)",
+            r"(了解|学习|研究).{0,15}(流程|规范|标准|操作)",
+            r"(参考|查阅).{0,15}(文档|资料)",
+            r"(查找|搜索).{0,15}(相关|有关).{0,10}(资料|信息)"
+        )))
     
     def analyze(self, user_text: str) -> SearchAnalysis:
         """
@@ -80,108 +135,166 @@ class SmartDocSearchAnalyzer:
         Returns:
             SearchAnalysis: 分析结果
         """
-        text_lower = user_text.lower().strip()
+        return self._analyze_cached(user_text.lower().strip())
+    
+    def analyze_many(self, texts: List[str]) -> List[SearchAnalysis]:
+        """
+        批量分析多条消息（补处理积压消息等场景），结果与逐条调用 analyze 相同
+        
+        各条消息用分隔符拼接后，关键词扫描、疑问句和任务导向正则各只对整体扫描一遍，
+        再按偏移量把匹配结果分配回对应的消息。
+        
+        Args:
+            texts: 用户消息文本列表
+            
+        Returns:
+            List[SearchAnalysis]: 与 texts 一一对应的分析结果
+        """
+        normalized = [text.lower().strip() for text in texts]
+        results = {}
+        pending = []
+        for text in dict.fromkeys(normalized):
+            quick = self._precheck(text)
+            if quick is not None:
+                results[text] = quick
+            else:
+                pending.append(text)
         
+        if pending:
+            # 分隔符含换行：关键词不含换行，正则中的 . 也不匹配换行，匹配不会跨越两条消息
+            joined = _BATCH_SEPARATOR.join(pending)
+            starts = []
+            offset = 0
+            for text in pending:
+                starts.append(offset)
+                offset += len(text) + len(_BATCH_SEPARATOR)
+            
+            def owner(match) -> int:
+                return bisect.bisect_right(starts, match.start()) - 1
+            
+            found_sets = [set() for _ in pending]
+            for match in self._keyword_re.finditer(joined):
+                found_sets[owner(match)] |= self._keyword_prefixes[match.group(1)]
+            question_hits = {owner(match) for match in self._question_re.finditer(joined)}
+            task_hits = {owner(match) for match in self._task_re.finditer(joined)}
+            
+            for i, text in enumerate(pending):
+                results[text] = self._classify(text, found_sets[i], i in question_hits, i in task_hits)
+        
+        return [results[text] for text in normalized]
+    
+    def clear_cache(self):
+        """清空分析结果缓存（修改关键词后调用）"""
+        self._analyze_cached.cache_clear()
+    
+    def _analyze(self, text_lower: str) -> SearchAnalysis:
+        """分析规范化（小写、去首尾空白）后的文本"""
+        quick = self._precheck(text_lower)
+        if quick is not None:
+            return quick
+        return self._classify(text_lower, self._scan_keywords(text_lower))
+    
+    def _precheck(self, text_lower: str) -> Optional[SearchAnalysis]:
+        """无需关键词扫描即可判定的消息（空消息、纯问候），其余返回 None"""
         # 1. 基础检查
         if not text_lower:
             return SearchAnalysis(False, 0.0, "空消息", "")
         
+        # 纯问候的短消息不可能命中后续任何规则，跳过关键词扫描和正则匹配
+        if len(text_lower) < 12 and self._greeting_only_re.fullmatch(text_lower):
+            return SearchAnalysis(False, 0.05, "问候语", "")
+        
+        return None
+    
+    def _classify(self, text_lower: str, found: set,
+                  question_hit: Optional[bool] = None, task_hit: Optional[bool] = None) -> SearchAnalysis:
+        """
+        按规则优先级判定
+        
+        question_hit / task_hit 为批量分析时预先算好的正则结果，None 表示需要时再匹配
+        """
         # 2. 关键词匹配（高权重）
-        keyword_match = self._check_keywords(text_lower)
+        keyword_match = self._check_keywords(found)
         if keyword_match:
             query = self._extract_query(text_lower)
             return SearchAnalysis(True, 0.9, f"匹配关键词: {keyword_match}", query)
         
         # 3. 疑问句模式（中高权重）
-        question_match = self._check_question_patterns(text_lower)
+        question_match = self._check_question_patterns(text_lower, found, question_hit)
         if question_match:
             query = self._extract_query(text_lower)
             return SearchAnalysis(True, 0.8, f"疑问句模式: {question_match}", query)
         
         # 4. 任务导向语句（中权重）
-        task_match = self._check_task_patterns(text_lower)
+        task_match = self._check_task_patterns(text_lower, task_hit)
         if task_match:
             query = self._extract_query(text_lower)
             return SearchAnalysis(True, 0.7, f"任务导向: {task_match}", query)
         
         # 5. 上下文相关性（中权重）
-        context_match = self._check_context_patterns(text_lower)
+        context_match = self._check_context_patterns(found)
         if context_match:
             query = self._extract_query(text_lower)
             return SearchAnalysis(True, 0.6, f"上下文相关: {context_match}", query)
         
         # 6. 复杂查询判断（低权重）
-        if self._is_complex_query(text_lower):
+        if len(text_lower) >= 10 and self._is_complex_query(text_lower, found):
             query = self._extract_query(text_lower)
             return SearchAnalysis(True, 0.5, "复杂查询需要文档支持", query)
         
         # 7. 不需要搜索
         return SearchAnalysis(False, 0.1, "常规对话，无需文档搜索", "")
     
-    def _check_keywords(self, text: str) -> str:
+    def _scan_keywords(self, text: str) -> set:
+        """一次扫描，返回文本中出现的所有关键词"""
+        found = set()
+        for keyword in set(self._keyword_re.findall(text)):
+            found |= self._keyword_prefixes[keyword]
+        return found
+    
+    def _check_keywords(self, found: set) -> str:
         """检查关键词匹配"""
-        for keyword in self.trigger_keywords:
-            if keyword.lower() in text:
-                return keyword
-        return ""
+        return next((keyword for keyword in self.trigger_keywords if keyword in found), "")
     
-    def _check_question_patterns(self, text: str) -> str:
+    def _check_question_patterns(self, text: str, found: set, regex_hit: Optional[bool] = None) -> str:
         """检查疑问句模式"""
         # 疑问词 + 内容词组合
         for indicator in self.question_indicators:
-            if indicator in text:
+            if indicator in found:
                 for content_word in self.content_words:
-                    if content_word in text:
+                    if content_word in found:
                         return f"{indicator}{content_word}"
         
         # 正则表达式模式
-        patterns = [
-            r"怎么.{0,15}(做|用|操作|配置|设置|部署)",
-            r"如何.{0,15}(做|用|操作|配置|设置|部署)",
-            r"(什么是|什么是|什么叫).{1,20}",
-            r".{1,20}(在哪|怎么找|哪里有)",
-            r"(有没有|是否存在).{1,20}(文档|说明|教程|资料)",
-            r"(请教|请问|求助).{1,20}(如何|怎么)"
-        ]
-        
-        for pattern in patterns:
-            if re.search(pattern, text):
-                return "疑问句模式匹配"
+        if regex_hit is None:
+            regex_hit = self._question_re.search(text) is not None
+        if regex_hit:
+            return "疑问句模式匹配"
         
         return ""
     
-    def _check_task_patterns(self, text: str) -> str:
+    def _check_task_patterns(self, text: str, regex_hit: Optional[bool] = None) -> str:
         """检查任务导向语句"""
-        patterns = [
-            r"(需要|准备|整理).{0,15}(文档|资料|信息)",
-            r"(了解|学习|研究).{0,15}(流程|规范|标准|操作)",
-            r"(参考|查阅).{0,15}(文档|资料)",
-            r"(查找|搜索).{0,15}(相关|有关).{0,10}(资料|信息)"
-        ]
-        
-        for pattern in patterns:
-            if re.search(pattern, text):
-                return "任务导向语句匹配"
+        if regex_hit is None:
+            regex_hit = self._task_re.search(text) is not None
+        if regex_hit:
+            return "任务导向语句匹配"
         
         return ""
     
-    def _check_context_patterns(self, text: str) -> str:
+    def _check_context_patterns(self, found: set) -> str:
         """检查上下文相关性"""
         for indicator in self.context_indicators:
-            if indicator in text:
+            if indicator in found:
                 for verb in self.need_verbs:
-                    if verb in text:
+                    if verb in found:
                         return f"{verb}{indicator}"
         return ""
     
-    def _is_complex_query(self, text: str) -> bool:
-        """判断是否为复杂查询"""
-        # 长度判断
-        if len(text) < 10:
-            return False
-            
+    def _is_complex_query(self, text: str, found: set) -> bool:
+        """判断是否为复杂查询（调用方已保证文本长度不少于 10）"""
         # 排除问候语
-        if any(greeting in text for greeting in self.greetings):
+        if not self._greeting_set.isdisjoint(found):
             return False
             
         # 结尾不是简单标点
@@ -192,32 +305,28 @@ class SmartDocSearchAnalyzer:
                 return True
         
         # 包含具体内容词汇
-        content_indicators = ["流程", "步骤", "方法", "配置", "使用", "操作"]
-        if any(indicator in text for indicator in content_indicators):
-            return True
-            
-        return False
+        return not self._complex_content_set.isdisjoint(found)
     
     def _extract_query(self, text: str) -> str:
         """从文本中提取搜索关键词"""
-        # 移除常见的前置词
-        prefixes = ["帮我", "请", "想", "要", "查找", "搜索", "查一下", "找一下"]
+        # 移除常见的前置词（先用元组一次判断，大多数消息无需逐个比较）
         query_text = text.lower()
         
-        for prefix in prefixes:
-            if query_text.startswith(prefix):
-                query_text = query_text[len(prefix):].strip()
-                break
+        if query_text.startswith(self._query_prefixes):
+            for prefix in self._query_prefixes:
+                if query_text.startswith(prefix):
+                    query_text = query_text[len(prefix):].strip()
+                    break
         
         # 移除后缀词
-        suffixes = ["的文档", "的资料", "怎么做", "如何做", "相关信息"]
-        for suffix in suffixes:
-            if query_text.endswith(suffix):
-                query_text = query_text[:-len(suffix)].strip()
-                break
+        if query_text.endswith(self._query_suffixes):
+            for suffix in self._query_suffixes:
+                if query_text.endswith(suffix):
+                    query_text = query_text[:-len(suffix)].strip()
+                    break
         
         # 清理特殊字符
-        query_text = re.sub(r'[^\w\s\u4e00-\u9fff]', '', query_text)
+        query_text = self._CLEAN_RE.sub('', query_text)
         
         return query_text.strip() if query_text else text.strip()
 
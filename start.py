@@ -6,14 +6,23 @@
 import subprocess
 import sys
 import os
+import shutil
 import time
 import webbrowser
 
+# 仅 macOS 上默认打开新的 Terminal 窗口；其他平台或 USE_TERMINAL=0 时直接在后台启动进程
+USE_TERMINAL = sys.platform == "darwin" and os.environ.get("USE_TERMINAL", "1") == "1"
+
 def print_step(step_num, title):
     print(f"\n{'='*60}")
     print(f"  步骤 {step_num}: {title}")
     print(f"{'='*60}\n")
 
+def spawn_background(args):
+    """不经过终端直接启动后台进程（close_fds=False 时 subprocess 在 Linux/macOS 上走 posix_spawn）"""
+    executable = shutil.which(args[0]) or args[0]
+    return subprocess.Popen([executable] + list(args[1:]), close_fds=False)
+
 def check_env_file():
     """检查环境配置文件"""
     print_step(1, "检查配置文件")
@@ -78,6 +87,17 @@ def start_bot_service():
     """启动飞书机器人服务"""
     print_step(3, "启动飞书机器人服务")
     
+    if not USE_TERMINAL:
+        try:
+            process = spawn_background([sys.executable, "feishu_bot.py"])
+            print(f"✅ 服务已在后台启动 (PID: {process.pid})")
+            time.sleep(2)
+            return True
+        except Exception as e:
+            print(f"❌ 无法自动启动: {e}")
+            print("   请手动执行: python3 feishu_bot.py")
+            return False
+    
     print("正在新终端窗口中启动服务...")
     
     # macOS 使用 osascript 打开新终端
@@ -108,6 +128,18 @@ def start_ngrok():
     if os.path.exists('./ngrok'):
         ngrok_cmd = './ngrok'
     
+    if not USE_TERMINAL:
+        try:
+            process = spawn_background([ngrok_cmd, "http", "5000"])
+            print(f"✅ ngrok 已在后台启动 (PID: {process.pid})")
+            print("   查看公网地址: http://localhost:4040")
+            time.sleep(3)
+            return True
+        except Exception as e:
+            print(f"❌ 无法自动启动: {e}")
+            print(f"   请手动执行: {ngrok_cmd} http 5000")
+            return False
+    
     print("正在新终端窗口中启动 ngrok...")
     
     script = f'''
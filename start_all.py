@@ -46,8 +46,10 @@ def main():
     print("\n🤖 启动 Qoder 千问服务...")
     qoder_env = os.environ.copy()
     # 最关键：流式齐输出，不使用 PIPE，这样可以实时看到 stdout 和 stderr
+    # 使用 gunicorn 多进程多线程运行，避免 Flask 开发服务器串行处理并发对话
     qoder_process = subprocess.Popen(
-        [sys.executable, "qoder_qwen.py"],
+        # 用当前解释器的 gunicorn 模块启动，确保与应用依赖处于同一环境（而非 PATH 上的第一个 gunicorn）
+        [sys.executable, "-m", "gunicorn", "-c", "gunicorn_conf.py", "-b", f"0.0.0.0:{qoder_port}", "qoder_qwen:app"],
         env=qoder_env,
         # 不默认转向，流式齐输出，便实时看到错误
         bufsize=1,  # 行罐冲
@@ -9,11 +9,15 @@ import time
 import sys
 import os
 from pathlib import Path
+from daemon_utils import wait_for_exit
 
 # 获取当前脚本所在目录
 SCRIPT_DIR = Path(__file__).parent
 BOT_SCRIPT = SCRIPT_DIR / "feishu_bot.py"
 
+# 没有子进程退出事件时，每隔多少秒打印一次运行状态
+HEALTH_CHECK_INTERVAL = 60
+
 def kill_process_on_port(port=5004):
     """杀死占用指定端口的进程"""
     try:
@@ -71,8 +75,8 @@ def monitor_feishu_bot():
                     time.sleep(30)
                     continue
             
-            # 每10秒检查一次进程状态
-            time.sleep(10)
+            # 等待进程退出，或到达下一次状态检查
+            wait_for_exit(process, HEALTH_CHECK_INTERVAL)
             
             # 检查进程是否还活着
             if process and process.poll() is None:
@@ -83,7 +87,8 @@ def monitor_feishu_bot():
             if process:
                 print(f"正在停止飞书机器人 (PID: {process.pid})...")
                 process.terminate()
-                time.sleep(2)
+                # 最多等待 2 秒，进程退出后立即继续
+                wait_for_exit(process, 2)
                 if process.poll() is None:
                     process.kill()
             print("✓ 飞书机器人已停止")
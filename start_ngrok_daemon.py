@@ -8,20 +8,28 @@ import subprocess
 import time
 import sys
 import os
-import requests
+import json
+import http.client
 from pathlib import Path
+from daemon_utils import wait_for_exit
+
+# ngrok 本地管理接口的长连接：每 5 秒轮询复用同一个 TCP 连接
+# 只访问这一个本地接口，用标准库即可，守护进程无需加载 requests/urllib3
+_NGROK_API = http.client.HTTPConnection("localhost", 4040, timeout=5)
 
 def get_ngrok_url():
     """获取当前 ngrok 的公网 URL"""
     try:
-        response = requests.get('http://localhost:4040/api/tunnels', timeout=5)
-        data = response.json()
+        _NGROK_API.request("GET", "/api/tunnels")
+        data = json.loads(_NGROK_API.getresponse().read())
         if data.get('tunnels'):
             for tunnel in data['tunnels']:
                 if tunnel.get('proto') == 'https':
                     return tunnel.get('public_url')
         return None
     except:
+        # 关闭失效的连接，下次请求时自动重连
+        _NGROK_API.close()
         return None
 
 def start_ngrok():
@@ -72,8 +80,8 @@ def monitor_ngrok():
                     time.sleep(30)
                     continue
             
-            # 每5秒检查一次 ngrok 状态
-            time.sleep(5)
+            # 每5秒检查一次 ngrok 状态，ngrok 退出时立即唤醒
+            wait_for_exit(process, 5)
             
             # 检查进程是否还活着
             if process and process.poll() is None:
@@ -94,7 +102,8 @@ def monitor_ngrok():
             if process:
                 print(f"正在停止 ngrok (PID: {process.pid})...")
                 process.terminate()
-                time.sleep(2)
+                # 最多等待 2 秒，进程退出后立即继续
+                wait_for_exit(process, 2)
                 if process.poll() is None:
                     process.kill()
             print("✓ ngrok 已停止")
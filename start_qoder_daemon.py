@@ -8,49 +8,118 @@ import subprocess
 import time
 import sys
 import os
+import signal
 from pathlib import Path
+from daemon_utils import wait_for_exit
 
 # 获取当前脚本所在目录
 SCRIPT_DIR = Path(__file__).parent
 QODER_SCRIPT = SCRIPT_DIR / "qoder_qwen.py"
 
+# 进程正常运行时，每隔多少秒打印一次运行状态
+HEALTH_CHECK_INTERVAL = 10
+
 def check_port_available(port=8081):
-    """检查端口是否被占用"""
+    """检查端口是否被占用（尝试绑定，无需建立连接）"""
     import socket
     try:
         with socket.socket(socket.AF_INET, socket.SOCK_STREAM) as s:
-            result = s.connect_ex(('127.0.0.1', port))
-            return result != 0  # 0 = 端口被占用，非0 = 端口可用
-    except:
+            # 与服务一样绑定到所有地址；SO_REUSEADDR 使 TIME_WAIT 状态的旧连接不算占用
+            s.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+            s.bind(('0.0.0.0', port))
+            return True
+    except OSError:
         return False
 
+def find_pids_on_port(port):
+    """
+    查找监听指定端口的进程 PID（Linux，直接读取 /proc，无需 lsof）
+    
+    先从 /proc/net/tcp{,6} 找出本地端口匹配的 socket inode，
+    再扫描 /proc/*/fd 找到持有这些 socket 的进程。
+    """
+    inodes = set()
+    port_hex = f":{port:04X}"
+    for table in ("/proc/net/tcp", "/proc/net/tcp6"):
+        try:
+            with open(table) as f:
+                next(f)  # 跳过表头
+                for line in f:
+                    fields = line.split()
+                    # fields[1] 为 本地地址:端口（十六进制），fields[9] 为 socket inode
+                    if fields[1].endswith(port_hex) and fields[9] != "0":
+                        inodes.add(f"socket:[{fields[9]}]")
+        except OSError:
+            continue
+    
+    pids = set()
+    if not inodes:
+        return pids
+    for pid in os.listdir("/proc"):
+        if not pid.isdigit():
+            continue
+        fd_dir = f"/proc/{pid}/fd"
+        try:
+            for fd in os.listdir(fd_dir):
+                if os.readlink(f"{fd_dir}/{fd}") in inodes:
+                    pids.add(int(pid))
+                    break
+        except OSError:
+            # 进程已退出或无权限访问
+            continue
+    pids.discard(os.getpid())
+    return pids
+
+def wait_port_released(port, timeout=1.0):
+    """等待端口释放，释放后立即返回 True，最多等待 timeout 秒"""
+    for _ in range(int(timeout / 0.05)):
+        if check_port_available(port):
+            return True
+        time.sleep(0.05)
+    return False
+
 def kill_process_on_port(port=8081):
     """杀死占用指定端口的进程"""
     try:
-        os.system(f"lsof -ti:{port} | xargs kill -9 2>/dev/null")
+        if not os.path.exists("/proc/net/tcp"):
+            # 非 Linux 平台（如 macOS）没有 /proc，仍借助 lsof
+            os.system(f"lsof -ti:{port} | xargs kill -9 2>/dev/null")
+            pids = set()
+        else:
+            # 先 SIGTERM 让旧进程正常退出
+            pids = find_pids_on_port(port)
+            for pid in pids:
+                try:
+                    os.kill(pid, signal.SIGTERM)
+                except ProcessLookupError:
+                    pass
         print(f"✓ 已清理端口 {port} 上的旧进程")
-        time.sleep(1)
+        if wait_port_released(port):
+            return
+        # 超时仍未释放则强制结束，并再次等待内核回收端口，避免新服务绑定失败
+        for pid in pids:
+            try:
+                os.kill(pid, signal.SIGKILL)
+            except ProcessLookupError:
+                pass
+        wait_port_released(port)
     except:
         pass
 
 def start_qoder():
     """启动 Qoder 千问服务"""
-    print("\n" + "="*60)
-    print("🤖 启动 Qoder 千问服务守护进程...")
-    print("="*60)
+    print(f"\n{'=' * 60}\n🤖 启动 Qoder 千问服务守护进程...\n{'=' * 60}")
     
     # 清理旧进程
     kill_process_on_port(8081)
     
     try:
         # 启动 qoder_qwen.py
+        # 子进程直接继承守护进程的 stdout/stderr（start_all_daemons.sh 已重定向到日志文件）；
+        # 原先的 PIPE 从未被读取，输出超过管道缓冲区（64 KiB）后服务会阻塞在写日志上
         process = subprocess.Popen(
             [sys.executable, str(QODER_SCRIPT)],
-            cwd=SCRIPT_DIR,
-            stdout=subprocess.PIPE,
-            stderr=subprocess.PIPE,
-            text=True,
-            bufsize=1
+            cwd=SCRIPT_DIR
         )
         print(f"✓ Qoder 进程启动成功 (PID: {process.pid})")
         return process
@@ -81,19 +150,20 @@ def monitor_qoder():
                     time.sleep(30)
                     continue
             
-            # 每10秒检查一次进程状态
-            time.sleep(10)
+            # 等待进程退出，或到达下一次状态检查
+            wait_for_exit(process, HEALTH_CHECK_INTERVAL)
             
-            # 检查进程是否还活着
-            if process and process.poll() is None:
-                print(f"✓ Qoder 服务运行中 (PID: {process.pid}) - {time.strftime('%H:%M:%S')}")
+            # 检查进程是否还活着（进程提前退出时直接进入下一轮重启，不生成心跳时间串）
+            if process.poll() is None:
+                print(f"✓ Qoder 服务运行中 (PID: {process.pid}) - {time.strftime('%H:%M:%S', time.localtime())}")
             
         except KeyboardInterrupt:
             print("\n\n🛑 收到停止信号...")
             if process:
                 print(f"正在停止 Qoder 服务 (PID: {process.pid})...")
                 process.terminate()
-                time.sleep(2)
+                # 最多等待 2 秒，进程退出后立即继续
+                wait_for_exit(process, 2)
                 if process.poll() is None:
                     process.kill()
             print("✓ Qoder 服务已停止")
@@ -115,8 +185,8 @@ if __name__ == "__main__":
         print(f"  请确保当前目录是: {SCRIPT_DIR}")
         sys.exit(1)
     
-    print(f"📂 服务脚本: {QODER_SCRIPT}")
-    print(f"🔌 监控端口: 8081")
-    print(f"📋 按 Ctrl+C 停止守护进程\n")
+    print(f"📂 服务脚本: {QODER_SCRIPT}\n"
+          "🔌 监控端口: 8081\n"
+          "📋 按 Ctrl+C 停止守护进程\n")
     
     monitor_qoder()
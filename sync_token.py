@@ -6,47 +6,71 @@
 
 import json
 import os
+import subprocess
 import sys
-import webbrowser
+from pathlib import Path
 
 TOKEN_FILE = "feishu_user_token.json"
 
-def main():
-    print("\n🚀 一键同步飞书 Token 到 Railway")
-    print("=" * 80)
-    
-    # 检查 Token 文件
-    if not os.path.exists(TOKEN_FILE):
-        print(f"❌ 错误: 找不到 {TOKEN_FILE}")
-        print("请先运行: python3 get_token.py")
-        sys.exit(1)
+HEADER = "\n🚀 一键同步飞书 Token 到 Railway\n" + "=" * 80 + "\n"
+
+def open_url(url):
+    """
+    用系统默认方式打开链接
     
-    with open(TOKEN_FILE, 'r') as f:
-        token_data = json.load(f)
+    直接调用平台自带的打开命令，省去 webbrowser 逐个探测浏览器的开销；
+    命令不可用时退回 webbrowser。
+    """
+    try:
+        if sys.platform == "darwin":
+            subprocess.Popen(["open", url], stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+        elif os.name == "nt":
+            os.startfile(url)
+        else:
+            subprocess.Popen(["xdg-open", url], stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+        return
+    except OSError:
+        pass
     
-    print("✅ 读取 Token 文件成功\n")
+    import webbrowser
+    webbrowser.open(url)
+
+def main():
+    # 直接读取并解析 Token 文件，不存在时再报错（省去一次 exists 检查）
+    try:
+        token_data = json.loads(Path(TOKEN_FILE).read_bytes())
+    except FileNotFoundError:
+        sys.stdout.write(f"{HEADER}❌ 错误: 找不到 {TOKEN_FILE}\n请先运行: python3 get_token.py\n")
+        sys.exit(1)
     
-    # 方案 1: 手动复制到 Railway (最快)
-    print("📋 方案 1: 手动配置 Railway (推荐，最快)")
-    print("-" * 80)
-    print("打开 Railway 项目设置 → Variables，添加/更新以下环境变量：\n")
-    print(f"FEISHU_USER_ACCESS_TOKEN={token_data['access_token']}")
-    print(f"FEISHU_USER_REFRESH_TOKEN={token_data['refresh_token']}")
-    print(f"FEISHU_USER_TOKEN_SCOPE={token_data['scope']}")
-    print(f"FEISHU_USER_TOKEN_OBTAINED_AT={token_data['obtained_at']}")
-    print()
+    access_token = token_data['access_token']
+    refresh_token = token_data['refresh_token']
+    scope = token_data['scope']
+    obtained_at = token_data['obtained_at']
     
-    # 方案 2: GitHub Actions 自动化
-    print("🤖 方案 2: 通过 GitHub Actions 自动同步 (需配置)")
-    print("-" * 80)
-    print("1. 在 GitHub 仓库设置 Secrets: RAILWAY_TOKEN")
-    print("2. 打开 Actions → Sync Feishu Token to Railway → Run workflow")
-    print("3. 填入以下参数：")
-    print(f"   - access_token: {token_data['access_token'][:30]}...")
-    print(f"   - refresh_token: {token_data['refresh_token'][:30]}...")
-    print(f"   - token_scope: {token_data['scope']}")
-    print(f"   - obtained_at: {token_data['obtained_at']}")
-    print()
+    # 两种方案的说明一次性写出
+    sys.stdout.write(
+        f"{HEADER}"
+        "✅ 读取 Token 文件成功\n\n"
+        # 方案 1: 手动复制到 Railway (最快)
+        "📋 方案 1: 手动配置 Railway (推荐，最快)\n"
+        f"{'-' * 80}\n"
+        "打开 Railway 项目设置 → Variables，添加/更新以下环境变量：\n\n"
+        f"FEISHU_USER_ACCESS_TOKEN={access_token}\n"
+        f"FEISHU_USER_REFRESH_TOKEN={refresh_token}\n"
+        f"FEISHU_USER_TOKEN_SCOPE={scope}\n"
+        f"FEISHU_USER_TOKEN_OBTAINED_AT={obtained_at}\n\n"
+        # 方案 2: GitHub Actions 自动化
+        "🤖 方案 2: 通过 GitHub Actions 自动同步 (需配置)\n"
+        f"{'-' * 80}\n"
+        "1. 在 GitHub 仓库设置 Secrets: RAILWAY_TOKEN\n"
+        "2. 打开 Actions → Sync Feishu Token to Railway → Run workflow\n"
+        "3. 填入以下参数：\n"
+        f"   - access_token: {access_token[:30]}...\n"
+        f"   - refresh_token: {refresh_token[:30]}...\n"
+        f"   - token_scope: {scope}\n"
+        f"   - obtained_at: {obtained_at}\n\n"
+    )
     
     # 询问是否打开浏览器
     choice = input("选择操作:\n  1 - 复制后手动配置 Railway\n  2 - 打开 GitHub Actions 页面\n  q - 退出\n\n请选择 (1/2/q): ").strip()
@@ -58,16 +82,18 @@ def main():
         # 尝试打开 GitHub Actions 页面
         repo_url = "https://github.com/cweipeng001/feishu-bot/actions/workflows/sync-token.yml"
         print(f"\n🌐 正在打开: {repo_url}")
-        webbrowser.open(repo_url)
+        open_url(repo_url)
     else:
         print("\n👋 已退出")
     
-    print("\n" + "=" * 80)
-    print("⚠️  注意:")
-    print("  - access_token 有效期 2 小时，但 Railway 会自动刷新")
-    print("  - refresh_token 有效期 30 天")
-    print("  - 每次本地重新授权后，需要重新同步")
-    print("=" * 80)
+    sys.stdout.write(
+        f"\n{'=' * 80}\n"
+        "⚠️  注意:\n"
+        "  - access_token 有效期 2 小时，但 Railway 会自动刷新\n"
+        "  - refresh_token 有效期 30 天\n"
+        "  - 每次本地重新授权后，需要重新同步\n"
+        f"{'=' * 80}\n"
+    )
 
 if __name__ == "__main__":
     main()
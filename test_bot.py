@@ -3,19 +3,77 @@
 用于测试各个功能模块
 """
 
+import argparse
+import io
+import os
 import requests
 import json
 import sys
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
 
+# 所有测试共享的会话：复用 keep-alive 连接，对远程（Railway）服务尤其明显
+SESSION = requests.Session()
+SESSION.headers.update({"Content-Type": "application/json"})
+_adapter = HTTPAdapter(
+    pool_connections=4,
+    pool_maxsize=8,
+    max_retries=Retry(total=2, backoff_factor=0.1)  # 默认只重试 GET 等幂等请求
+)
+SESSION.mount("http://", _adapter)
+SESSION.mount("https://", _adapter)
 
-def test_health_check(base_url="http://localhost:5000"):
+# 启动横幅，一次性输出
+BANNER = (
+    "\n\n"
+    "╔" + "=" * 48 + "╗\n"
+    "║" + " " * 10 + "飞书机器人与Qoder集成测试" + " " * 10 + "║\n"
+    "╚" + "=" * 48 + "╝\n"
+    "\n"
+)
+
+DEFAULT_BASE_URL = "http://localhost:5000"
+DEFAULT_QODER_ENDPOINT = "http://localhost:8080/api/chat"
+
+
+def prompt(message, default=""):
+    """在交互终端中提示输入；非交互环境（如 CI）不阻塞，直接使用默认值"""
+    if sys.stdin.isatty():
+        return input(message) or default
+    return default
+
+
+def parse_args(argv=None):
+    """解析命令行参数，未指定时读取环境变量，仍为空的项在交互终端中再提示输入"""
+    parser = argparse.ArgumentParser(description="飞书机器人与Qoder集成测试")
+    parser.add_argument("--base-url", default=os.getenv("TEST_BASE_URL"),
+                        help=f"服务地址（环境变量 TEST_BASE_URL，默认 {DEFAULT_BASE_URL}）")
+    parser.add_argument("--send-message", action="store_true",
+                        help="测试发送消息到飞书")
+    parser.add_argument("--chat-id", default=os.getenv("TEST_CHAT_ID"),
+                        help="飞书群组或用户的chat_id（环境变量 TEST_CHAT_ID）")
+    parser.add_argument("--message", default=None,
+                        help="要发送的测试消息（默认: 测试消息）")
+    parser.add_argument("--qoder", action="store_true",
+                        help="测试Qoder智能体集成")
+    parser.add_argument("--qoder-endpoint", default=os.getenv("QODER_API_ENDPOINT"),
+                        help=f"Qoder API端点（环境变量 QODER_API_ENDPOINT，默认 {DEFAULT_QODER_ENDPOINT}）")
+    parser.add_argument("--qoder-api-key", default=os.getenv("QODER_API_KEY"),
+                        help="Qoder API Key（环境变量 QODER_API_KEY，可选）")
+    return parser.parse_args(argv)
+
+
+def test_health_check(base_url=DEFAULT_BASE_URL, session=None):
     """测试健康检查接口"""
+    session = session or SESSION
     print("=" * 50)
     print("测试健康检查接口...")
     print("=" * 50)
     
     try:
-        response = requests.get(f"{base_url}/health", timeout=5)
+        response = session.get(f"{base_url}/health", timeout=5)
         print(f"状态码: {response.status_code}")
         print(f"响应: {response.json()}")
         
@@ -30,19 +88,21 @@ def test_health_check(base_url="http://localhost:5000"):
         return False
 
 
-def test_send_message(base_url="http://localhost:5000", chat_id=None):
+def test_send_message(base_url=DEFAULT_BASE_URL, chat_id=None, session=None, message=None):
     """测试发送消息接口"""
+    session = session or SESSION
     print("\n" + "=" * 50)
     print("测试发送消息接口...")
     print("=" * 50)
     
     if not chat_id:
-        chat_id = input("请输入飞书群组或用户的chat_id: ")
+        chat_id = prompt("请输入飞书群组或用户的chat_id: ")
     
-    message = input("请输入要发送的测试消息（默认: 测试消息）: ") or "测试消息"
+    if message is None:
+        message = prompt("请输入要发送的测试消息（默认: 测试消息）: ", "测试消息")
     
     try:
-        response = requests.post(
+        response = session.post(
             f"{base_url}/test/send",
             json={"chat_id": chat_id, "message": message},
             timeout=10
@@ -61,8 +121,9 @@ def test_send_message(base_url="http://localhost:5000", chat_id=None):
         return False
 
 
-def test_feishu_callback(base_url="http://localhost:5000"):
+def test_feishu_callback(base_url=DEFAULT_BASE_URL, session=None):
     """模拟测试飞书回调"""
+    session = session or SESSION
     print("\n" + "=" * 50)
     print("模拟测试飞书回调...")
     print("=" * 50)
@@ -76,7 +137,7 @@ def test_feishu_callback(base_url="http://localhost:5000"):
     
     try:
         print("\n1. 测试URL验证...")
-        response = requests.post(
+        response = session.post(
             f"{base_url}/feishu/callback",
             json=url_verification_data,
             timeout=10
@@ -96,14 +157,17 @@ def test_feishu_callback(base_url="http://localhost:5000"):
     return True
 
 
-def test_qoder_integration():
+def test_qoder_integration(session=None, qoder_endpoint=None, api_key=None):
     """测试Qoder集成（需要Qoder服务运行）"""
+    session = session or SESSION
     print("\n" + "=" * 50)
     print("测试Qoder智能体集成...")
     print("=" * 50)
     
-    qoder_endpoint = input("请输入Qoder API端点（默认: http://localhost:8080/api/chat）: ") or "http://localhost:8080/api/chat"
-    api_key = input("请输入Qoder API Key（可选）: ") or ""
+    if qoder_endpoint is None:
+        qoder_endpoint = prompt(f"请输入Qoder API端点（默认: {DEFAULT_QODER_ENDPOINT}）: ", DEFAULT_QODER_ENDPOINT)
+    if api_key is None:
+        api_key = prompt("请输入Qoder API Key（可选）: ")
     
     headers = {
         "Content-Type": "application/json"
@@ -123,7 +187,7 @@ def test_qoder_integration():
     }
     
     try:
-        response = requests.post(
+        response = session.post(
             qoder_endpoint,
             headers=headers,
             json=data,
@@ -146,42 +210,89 @@ def test_qoder_integration():
         return False
 
 
-def main():
+def run_tests_concurrently(tests):
+    """
+    并发执行互不依赖的测试，总耗时取决于最慢的一项
+    
+    每个测试的输出先缓存在各自线程中，全部完成后按顺序打印，避免多项测试的输出交错。
+    
+    Args:
+        tests: {测试名称: (测试函数, 参数元组)}
+        
+    Returns:
+        {测试名称: 测试结果}
+    """
+    real_stdout = sys.stdout
+    local = threading.local()
+    
+    class _ThreadStdout:
+        """按线程分发 print 输出：测试线程写入自己的缓冲区，其他线程照常输出"""
+        def write(self, text):
+            return getattr(local, "buffer", real_stdout).write(text)
+        
+        def flush(self):
+            real_stdout.flush()
+    
+    def run(func, args):
+        local.buffer = io.StringIO()
+        try:
+            return func(*args), local.buffer.getvalue()
+        finally:
+            del local.buffer
+    
+    sys.stdout = _ThreadStdout()
+    try:
+        with ThreadPoolExecutor(max_workers=len(tests)) as pool:
+            futures = {name: pool.submit(run, func, args) for name, (func, args) in tests.items()}
+            outcomes = {name: future.result() for name, future in futures.items()}
+    finally:
+        sys.stdout = real_stdout
+    
+    results = {}
+    for name, (result, output) in outcomes.items():
+        print(output, end="")
+        results[name] = result
+    return results
+
+
+def main(argv=None):
     """主测试函数"""
-    print("\n")
-    print("╔" + "=" * 48 + "╗")
-    print("║" + " " * 10 + "飞书机器人与Qoder集成测试" + " " * 10 + "║")
-    print("╚" + "=" * 48 + "╝")
-    print("\n")
-    
-    base_url = input("请输入服务地址（默认: http://localhost:5000）: ") or "http://localhost:5000"
-    
-    # 执行测试
-    results = {
-        "健康检查": test_health_check(base_url),
-        "飞书回调": test_feishu_callback(base_url),
+    args = parse_args(argv)
+    
+    print(BANNER)
+    
+    base_url = args.base_url or prompt(f"请输入服务地址（默认: {DEFAULT_BASE_URL}）: ", DEFAULT_BASE_URL)
+    
+    tests = {
+        "健康检查": (test_health_check, (base_url,)),
+        "飞书回调": (test_feishu_callback, (base_url,)),
     }
     
+    # 先收集所有输入（命令行参数 > 环境变量 > 交互提示），再统一并发执行测试
     # 询问是否测试发送消息
-    if input("\n是否测试发送消息到飞书？(y/n，默认: n): ").lower() == "y":
-        results["发送消息"] = test_send_message(base_url)
+    if args.send_message or prompt("\n是否测试发送消息到飞书？(y/n，默认: n): ", "n").lower() == "y":
+        chat_id = args.chat_id or prompt("请输入飞书群组或用户的chat_id: ")
+        message = args.message or prompt("请输入要发送的测试消息（默认: 测试消息）: ", "测试消息")
+        tests["发送消息"] = (test_send_message, (base_url, chat_id, None, message))
     
     # 询问是否测试Qoder集成
-    if input("\n是否测试Qoder智能体集成？(y/n，默认: n): ").lower() == "y":
-        results["Qoder集成"] = test_qoder_integration()
-    
-    # 输出测试结果汇总
-    print("\n" + "=" * 50)
-    print("测试结果汇总")
-    print("=" * 50)
+    if args.qoder or prompt("\n是否测试Qoder智能体集成？(y/n，默认: n): ", "n").lower() == "y":
+        qoder_endpoint = args.qoder_endpoint or prompt(
+            f"请输入Qoder API端点（默认: {DEFAULT_QODER_ENDPOINT}）: ", DEFAULT_QODER_ENDPOINT
+        )
+        api_key = args.qoder_api_key if args.qoder_api_key is not None else prompt("请输入Qoder API Key（可选）: ")
+        tests["Qoder集成"] = (test_qoder_integration, (None, qoder_endpoint, api_key))
     
-    for test_name, result in results.items():
-        status = "✅ 通过" if result else "❌ 失败"
-        print(f"{test_name}: {status}")
+    # 执行测试（各项测试互不依赖，并发执行）
+    results = run_tests_concurrently(tests)
     
+    # 输出测试结果汇总
     total = len(results)
     passed = sum(results.values())
-    print(f"\n总计: {passed}/{total} 项测试通过")
+    summary = "\n".join(
+        f"{test_name}: {'✅ 通过' if result else '❌ 失败'}" for test_name, result in results.items()
+    )
+    print(f"\n{'=' * 50}\n测试结果汇总\n{'=' * 50}\n{summary}\n\n总计: {passed}/{total} 项测试通过")
     
     if passed == total:
         print("\n🎉 所有测试通过！")
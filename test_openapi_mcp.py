@@ -4,15 +4,13 @@
 """
 
 import os
-import json
+import time
 from dotenv import load_dotenv
 from feishu_openapi_mcp import get_openapi_docs_manager, search_feishu_knowledge_openapi
 
 def test_openapi_mcp():
     """测试 OpenAPI MCP 基本功能"""
-    print("=" * 60)
-    print("🧪 OpenAPI MCP 功能测试")
-    print("=" * 60)
+    print(f"{'=' * 60}\n🧪 OpenAPI MCP 功能测试\n{'=' * 60}")
     
     # 加载环境变量
     load_dotenv()
@@ -22,10 +20,16 @@ def test_openapi_mcp():
         manager = get_openapi_docs_manager()
         print("✅ 成功创建 OpenAPI 文档管理器")
         
+        # 预热：先启动 MCP 服务，使搜索耗时不包含服务启动时间
+        start = time.perf_counter()
+        manager.warmup()
+        print(f"🔥 MCP 服务预热完成，耗时 {time.perf_counter() - start:.2f}s")
+        
         # 测试搜索功能
         print("\n🔍 测试文档搜索功能...")
+        start = time.perf_counter()
         result = search_feishu_knowledge_openapi("测试", 1)
-        print("搜索结果:")
+        print(f"搜索结果（耗时 {time.perf_counter() - start:.2f}s）:")
         print(result)
         
         print("\n✅ OpenAPI MCP 测试完成")
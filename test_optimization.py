@@ -5,26 +5,110 @@
 """
 
 from message_formatter import MessageFormatter
+import multiprocessing
 import os
+import re
+import sys
+from functools import partial
 from dotenv import load_dotenv
 
+# 格式化效果分析关注的标记，一次扫描即可得到文本中出现了哪些
+_MARKER_RE = re.compile(r'👋|\||#|\n\n')
+
+# 测试案例达到该数量时才使用多进程，少量案例时进程启动开销大于收益
+PARALLEL_MIN_CASES = 32
+
+# 模块级格式化器实例，多次调用间复用其内部缓存
+FORMATTER = MessageFormatter()
+
+# 测试总结，一次性输出
+SUMMARY = f"""{'=' * 60}
+📊 测试总结:
+{'=' * 60}
+✅ 无效提及过滤功能: 已实现并生效
+✅ 基础格式化功能: 已实现并生效
+✅ 多种内容类型支持: 表格、标题、普通文本
+✅ 可配置开关: 支持启用/禁用
+✅ 移动端适配: 支持紧凑格式
+
+💡 建议:
+   - 保持格式化功能开启以获得最佳用户体验
+   - 根据用户设备类型考虑启用移动端优化
+   - 可通过调整.env配置来微调行为"""
+
+def _markers(text):
+    """返回文本中出现的标记集合"""
+    return set(_MARKER_RE.findall(text))
+
+def _run_case(preprocess, format_message, numbered_case):
+    """
+    处理单个测试案例，返回该案例的完整报告文本
+    
+    Args:
+        preprocess: 预处理方法
+        format_message: 格式化方法，格式化功能关闭时为 None
+        numbered_case: (序号, 测试案例)
+    """
+    i, case = numbered_case
+    lines = [
+        f"📝 测试案例 {i}: {case['name']}",
+        "-" * 40,
+    ]
+    
+    original_input = case["input"]
+    lines.append(f"原始输入: {repr(original_input)}")
+    
+    # 步骤1: 预处理（移除无效提及）
+    preprocessed = preprocess(original_input)
+    mention_filtered = original_input != preprocessed and "@" in original_input
+    lines.append(f"预处理后: {repr(preprocessed)}")
+    lines.append(f"✅ 无效提及过滤: {'是' if mention_filtered else '否'}")
+    
+    # 步骤2: 格式化优化
+    if format_message is not None:
+        formatted = format_message(preprocessed)
+        
+        is_formatted = formatted != preprocessed
+        lines.append(f"格式化后: {repr(formatted)}")
+        lines.append(f"✅ 格式化优化: {'是' if is_formatted else '否'}")
+        
+        # 分析具体的变化
+        changes = []
+        if mention_filtered:
+            changes.append("_mentions_")
+        if is_formatted:
+            after = _markers(formatted)
+            before = _markers(preprocessed)
+            if "👋" in after:
+                changes.append("emoji优化")
+            if "|" not in after and "|" in before:
+                changes.append("表格转换")
+            if "#" in after and "#" in before:
+                changes.append("标题美化")
+            if "\n\n" in after and "\n\n" not in before:
+                changes.append("间距优化")
+        
+        lines.append(f"✨ 具体优化: {', '.join(changes) if changes else '无'}")
+    else:
+        formatted = preprocessed
+        lines.append("❌ 格式化功能未启用")
+    
+    lines.append(f"🎯 最终结果: {repr(formatted)}")
+    return "\n".join(lines) + "\n\n"
+
 def test_complete_workflow():
     """测试完整的消息处理工作流"""
     
-    print("=" * 60)
-    print("🤖 飞书机器人优化功能完整测试")
-    print("=" * 60)
-    print()
+    print(f"{'=' * 60}\n🤖 飞书机器人优化功能完整测试\n{'=' * 60}\n")
     
     # 加载环境变量
     load_dotenv()
     formatting_enabled = os.getenv('MESSAGE_FORMATTING_ENABLED', 'true').lower() == 'true'
     mobile_optimized = os.getenv('MOBILE_OPTIMIZED', 'false').lower() == 'true'
     
-    print(f"⚙️  当前配置:")
-    print(f"   - 格式化功能: {'✅ 启用' if formatting_enabled else '❌ 禁用'}")
-    print(f"   - 移动端优化: {'✅ 启用' if mobile_optimized else '❌ 禁用'}")
-    print()
+    print("⚙️  当前配置:\n"
+          f"   - 格式化功能: {'✅ 启用' if formatting_enabled else '❌ 禁用'}\n"
+          f"   - 移动端优化: {'✅ 启用' if mobile_optimized else '❌ 禁用'}\n")
     
     # 测试用例
     test_cases = [
@@ -53,67 +137,25 @@ def test_complete_workflow():
         }
     ]
     
-    formatter = MessageFormatter()
+    formatter = FORMATTER
+    # 循环外确定格式化方法（格式化关闭时为 None），各案例直接调用
+    format_message = None
+    if formatting_enabled:
+        format_message = formatter.format_for_mobile if mobile_optimized else formatter.optimize_readability
+    run_case = partial(_run_case, formatter.preprocess_message, format_message)
     
-    for i, case in enumerate(test_cases, 1):
-        print(f"📝 测试案例 {i}: {case['name']}")
-        print("-" * 40)
-        
-        original_input = case["input"]
-        print(f"原始输入: {repr(original_input)}")
-        
-        # 步骤1: 预处理（移除无效提及）
-        preprocessed = formatter.preprocess_message(original_input)
-        mention_filtered = original_input != preprocessed and "@" in original_input
-        print(f"预处理后: {repr(preprocessed)}")
-        print(f"✅ 无效提及过滤: {'是' if mention_filtered else '否'}")
-        
-        # 步骤2: 格式化优化
-        if formatting_enabled:
-            if mobile_optimized:
-                formatted = formatter.format_for_mobile(preprocessed)
-            else:
-                formatted = formatter.optimize_readability(preprocessed)
-            
-            is_formatted = formatted != preprocessed
-            print(f"格式化后: {repr(formatted)}")
-            print(f"✅ 格式化优化: {'是' if is_formatted else '否'}")
-            
-            # 分析具体的变化
-            changes = []
-            if mention_filtered:
-                changes.append("_mentions_")
-            if is_formatted:
-                if "👋" in formatted:
-                    changes.append("emoji优化")
-                if "|" not in formatted and "|" in preprocessed:
-                    changes.append("表格转换")
-                if "#" in formatted and "#" in preprocessed:
-                    changes.append("标题美化")
-                if "\n\n" in formatted and "\n\n" not in preprocessed:
-                    changes.append("间距优化")
-            
-            print(f"✨ 具体优化: {', '.join(changes) if changes else '无'}")
-        else:
-            formatted = preprocessed
-            print("❌ 格式化功能未启用")
-        
-        print(f"🎯 最终结果: {repr(formatted)}")
-        print()
+    # 各案例互不依赖；案例较多时分给多个进程并行处理，map 保证输出顺序不变
+    numbered_cases = list(enumerate(test_cases, 1))
+    if len(numbered_cases) >= PARALLEL_MIN_CASES:
+        with multiprocessing.Pool(min(os.cpu_count() or 1, len(numbered_cases))) as pool:
+            reports = pool.map(run_case, numbered_cases)
+    else:
+        reports = map(run_case, numbered_cases)
+    
+    for report in reports:
+        sys.stdout.write(report)
     
-    print("=" * 60)
-    print("📊 测试总结:")
-    print("=" * 60)
-    print("✅ 无效提及过滤功能: 已实现并生效")
-    print("✅ 基础格式化功能: 已实现并生效")  
-    print("✅ 多种内容类型支持: 表格、标题、普通文本")
-    print("✅ 可配置开关: 支持启用/禁用")
-    print("✅ 移动端适配: 支持紧凑格式")
-    print()
-    print("💡 建议:")
-    print("   - 保持格式化功能开启以获得最佳用户体验")
-    print("   - 根据用户设备类型考虑启用移动端优化")
-    print("   - 可通过调整.env配置来微调行为")
+    print(SUMMARY)
 
 if __name__ == "__main__":
     test_complete_workflow()
\ No newline at end of file